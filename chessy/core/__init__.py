@@ -220,6 +220,26 @@ class CastlingAvailability:
         elif square == Square.h8:
             self.black_kingside = False
 
+    def to_mask(self) -> int:
+        """
+        Pack into 4 bits: white kingside, white queenside, black kingside and black
+        queenside, from the least significant one.
+        """
+
+        return (
+            int(self.white_kingside)
+            | int(self.white_queenside) << 1
+            | int(self.black_kingside) << 2
+            | int(self.black_queenside) << 3
+        )
+
+    @staticmethod
+    def from_mask(mask: int) -> CastlingAvailability:
+        """The opposite of `to_mask`."""
+        return CastlingAvailability(
+            bool(mask & 1), bool(mask & 2), bool(mask & 4), bool(mask & 8)
+        )
+
 
 @dataclass(frozen=True, slots=True)
 class Move:
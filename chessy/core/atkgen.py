@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from functools import cached_property
 
 import chessy.core as c
+import chessy.core.bitboard as bb
 import chessy.core.board as cb
 
 
@@ -24,7 +25,6 @@ def _apply_directional_add(
     start: c.Square,
     directional_add: _DirectionalAdd,
     add_cycles_limit: int | None = None,
-    blockers: cb.Board | None = None,
 ) -> set[c.Square]:
     result: set[c.Square] = set()
 
@@ -50,12 +50,6 @@ def _apply_directional_add(
         ):
             break
 
-        if blockers is not None:
-            is_blocker_hit = blockers.get_piece_by_square(new_square) is not None
-            if is_blocker_hit:
-                _ok_next()
-                break
-
         _ok_next()
 
     return result
@@ -65,15 +59,230 @@ def _apply_multidirectional_add(
     directions: Iterable[_DirectionalAdd],
     square: c.Square,
     add_cycles_limit: int | None = None,
-    blockers: cb.Board | None = None,
 ) -> set[c.Square]:
     return {
         atk
         for direction in directions
-        for atk in _apply_directional_add(square, direction, add_cycles_limit, blockers)
+        for atk in _apply_directional_add(square, direction, add_cycles_limit)
     }
 
 
+# Magic numbers for the sliding attack tables. Each one maps every relevant occupancy
+# of its square into a unique index (or into an index shared only with occupancies
+# that produce the same attacks) of a `2 ** popcount(mask)` sized table. They were
+# found by trial and error with sparse random numbers, and the tables below check
+# this property while being built.
+_ROOK_MAGICS = (
+    0x0480002250844000,
+    0x8140001000200040,
+    0x0880081000812000,
+    0x0100082010010004,
+    0x0080040008008003,
+    0x0300110002080400,
+    0x1080008022000100,
+    0x0200040442220181,
+    0x0613002100800048,
+    0x0880401000402004,
+    0x2400808020001000,
+    0x00010010000C2100,
+    0x9004808044000800,
+    0x000A004200080410,
+    0x4014001004410208,
+    0x4003000100084082,
+    0x08C0208000804010,
+    0x0082838040002000,
+    0x0A01090020004010,
+    0x1023010022081001,
+    0x2004008008008004,
+    0x0004004002004100,
+    0x1000040002015098,
+    0x0830020001004084,
+    0x4140800080204003,
+    0x2401002100400080,
+    0x0010080020002400,
+    0x0001210A00120040,
+    0x9000480280040080,
+    0x0400020080800400,
+    0x20005504000E0890,
+    0xA009000900114086,
+    0x2080002000404000,
+    0x0020002080804004,
+    0x2840801000802004,
+    0x0241042009001000,
+    0x020E000492002048,
+    0x0408800400800200,
+    0x2001008419000A00,
+    0x0000188402000841,
+    0x0180010040810020,
+    0x8200201000404000,
+    0xD010080024002000,
+    0xC011023000630008,
+    0x0040080004008080,
+    0x0800040002008080,
+    0x0C0008390A840010,
+    0x00B4040050820021,
+    0x4140208000400080,
+    0xA8400020005000C0,
+    0x0A41200080100180,
+    0x8080480110008180,
+    0x0044040280080080,
+    0x4000040080020080,
+    0x0000D10A30080400,
+    0x0004010854008200,
+    0x0800120821004082,
+    0xA000120840208302,
+    0x00A0081420010041,
+    0x0000201000050009,
+    0xA02E001420B10812,
+    0x6202002450214802,
+    0x2240104209088824,
+    0x2000840093044022,
+)
+
+_BISHOP_MAGICS = (
+    0x0840212202104100,
+    0xC01B100112028918,
+    0x0050288214402440,
+    0x0C84040090400380,
+    0x0201104100022200,
+    0x00A1042004042000,
+    0x0002020220048000,
+    0x4002140404440400,
+    0x10204404100C0110,
+    0x00021818280A4050,
+    0x0080040810810080,
+    0xE112084481040238,
+    0x1202011040400004,
+    0x21001A0910081140,
+    0x0128820082A84042,
+    0x21821101080202A0,
+    0x802000328C014808,
+    0x026002040800A120,
+    0x4004800808010209,
+    0x0001000824010400,
+    0x0008800400A08280,
+    0x50120141C101A050,
+    0x020E010301501248,
+    0x10860000406A0820,
+    0x0C88210004200200,
+    0x0050188031010100,
+    0x0424021910008811,
+    0x6008080022202060,
+    0x3003010000444000,
+    0x0E30010028808080,
+    0x880A348804040115,
+    0x0C01005019005802,
+    0x11020240012008D2,
+    0x0101104880024812,
+    0x0064040100022200,
+    0x0900400820020201,
+    0x0118060400181010,
+    0x00100400200D1004,
+    0x1102008200340251,
+    0x00020C1040342A00,
+    0x02808404A0004000,
+    0x000084040216A088,
+    0x1100820802000101,
+    0x1008402214001801,
+    0x012A200AA4000180,
+    0x0040628780800100,
+    0x0804108401082040,
+    0x2810540090888820,
+    0x00104A08200A0000,
+    0x0080404804111000,
+    0x1100110088040020,
+    0x0000491084042040,
+    0x1520401020220041,
+    0x7020102001110400,
+    0x4042240102060800,
+    0x0010020208420808,
+    0x00031202020A4010,
+    0x040A002208020800,
+    0x0C68001600822120,
+    0x8040041000840400,
+    0x0000004008610100,
+    0x0880C40420042110,
+    0x0000200210011100,
+    0x0010440808104210,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _MagicEntry:
+    mask: int
+    magic: int
+    shift: int
+    attacks: list[int]
+
+
+_ROOK_RAYS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_BISHOP_RAYS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def _ray_bits(square_index: int, rays: Iterable[tuple[int, int]]) -> list[list[int]]:
+    """
+    For each (rank, file) ray starting from `square_index`, list the single-bit
+    bitboards it goes through, closest first. Only meant for building tables.
+    """
+
+    result: list[list[int]] = []
+    start_rank, start_file = divmod(square_index, 8)
+    for rank_step, file_step in rays:
+        ray: list[int] = []
+        rank, file = start_rank + rank_step, start_file + file_step
+        while 0 <= rank <= c.Square.last_rank() and 0 <= file <= c.Square.last_file():
+            ray.append(1 << (rank * 8 + file))
+            rank, file = rank + rank_step, file + file_step
+        result.append(ray)
+    return result
+
+
+def _build_magic_entries(
+    rays: Iterable[tuple[int, int]], magics: tuple[int, ...]
+) -> list[_MagicEntry]:
+    entries: list[_MagicEntry] = []
+    for square_index, magic in enumerate(magics):
+        square_rays = _ray_bits(square_index, rays)
+        # The last square of a ray is never relevant: whether it is occupied or not,
+        # it is attacked as long as the rest of the ray is empty.
+        mask = bb.EMPTY
+        for ray in square_rays:
+            for bit in ray[:-1]:
+                mask |= bit
+        nbits = bb.popcount(mask)
+        shift = 64 - nbits
+        attacks: list[int | None] = [None] * (1 << nbits)
+
+        # Carry-Rippler trick: enumerate every subset of `mask`.
+        occupancy = bb.EMPTY
+        while True:
+            occupancy_attacks = bb.EMPTY
+            for ray in square_rays:
+                for bit in ray:
+                    occupancy_attacks |= bit
+                    if occupancy & bit:
+                        break
+
+            index = ((occupancy * magic) & bb.FULL) >> shift
+            assert attacks[index] in {None, occupancy_attacks}, "Bad magic number"
+            attacks[index] = occupancy_attacks
+
+            occupancy = (occupancy - mask) & mask
+            if occupancy == bb.EMPTY:
+                break
+
+        entries.append(
+            _MagicEntry(
+                mask,
+                magic,
+                shift,
+                # Unused indexes can never be looked up.
+                [a if a is not None else bb.EMPTY for a in attacks],
+            )
+        )
+    return entries
+
+
 class _AttackTables:
     @cached_property
     def pawn_tables(self) -> tuple[list[set[c.Square]], list[set[c.Square]]]:
@@ -118,6 +327,40 @@ class _AttackTables:
 
         return tables
 
+    @cached_property
+    def pawn_bb_tables(self) -> tuple[list[int], list[int]]:
+        # Unlike `pawn_tables`, these are also filled for the first and last ranks.
+        # A pawn can't be there, but reverse lookups (which squares would attack
+        # a given square) rely on them.
+        white_tables: list[int] = []
+        black_tables: list[int] = []
+        for i in range(len(c.Square)):
+            square_bb = 1 << i
+            white_tables.append(
+                (((square_bb << 7) & ~bb.FILE_H) | ((square_bb << 9) & ~bb.FILE_A))
+                & bb.FULL
+            )
+            black_tables.append(
+                ((square_bb >> 9) & ~bb.FILE_H) | ((square_bb >> 7) & ~bb.FILE_A)
+            )
+        return white_tables, black_tables
+
+    @cached_property
+    def knight_bb_tables(self) -> list[int]:
+        return [bb.from_squares(attacks) for attacks in self.knight_tables]
+
+    @cached_property
+    def king_bb_tables(self) -> list[int]:
+        return [bb.from_squares(attacks) for attacks in self.king_tables]
+
+    @cached_property
+    def rook_magic_tables(self) -> list[_MagicEntry]:
+        return _build_magic_entries(_ROOK_RAYS, _ROOK_MAGICS)
+
+    @cached_property
+    def bishop_magic_tables(self) -> list[_MagicEntry]:
+        return _build_magic_entries(_BISHOP_RAYS, _BISHOP_MAGICS)
+
     @staticmethod
     def _generate_pawn_attacks(square: c.Square, piece: c.Piece) -> set[c.Square]:
         direction_factor = piece.direction_factor()
@@ -183,6 +426,11 @@ def force_init_all_tables() -> None:
     _ = _generate_pawn_attacks_precalc(c.Square.a2, c.Piece(c.Type.PAWN, c.Color.WHITE))
     _ = _generate_knight_attacks_precalc(c.Square.a1)
     _ = _generate_king_attacks_precalc(c.Square.a1)
+    _ = pawn_attacks_bb(0, c.Color.WHITE)
+    _ = knight_attacks_bb(0)
+    _ = king_attacks_bb(0)
+    _ = rook_attacks_bb(0, bb.EMPTY)
+    _ = bishop_attacks_bb(0, bb.EMPTY)
 
 
 # Common files in attack generation.
@@ -201,40 +449,89 @@ def _generate_pawn_attacks_precalc(square: c.Square, piece: c.Piece) -> set[c.Sq
         return black_tables[square.value]
 
 
-def _generate_rook_attacks(blockers: cb.Board, square: c.Square) -> set[c.Square]:
-    directions = (
-        _DirectionalAdd(8, None),
-        _DirectionalAdd(-8, None),
-        _DirectionalAdd(-1, _H),
-        _DirectionalAdd(1, _A),
-    )
-    return _apply_multidirectional_add(directions, square, blockers=blockers)
+def _generate_knight_attacks_precalc(square: c.Square) -> set[c.Square]:
+    knight_tables = _singleton_attack_tables.knight_tables
+    return knight_tables[square.value]
 
 
-def _generate_bishop_attacks(blockers: cb.Board, square: c.Square) -> set[c.Square]:
-    directions = (
-        _DirectionalAdd(7, _H),
-        _DirectionalAdd(9, _A),
-        _DirectionalAdd(-7, _A),
-        _DirectionalAdd(-9, _H),
-    )
-    return _apply_multidirectional_add(directions, square, blockers=blockers)
+def _generate_king_attacks_precalc(square: c.Square) -> set[c.Square]:
+    king_tables = _singleton_attack_tables.king_tables
+    return king_tables[square.value]
 
 
-def _generate_knight_attacks_precalc(square: c.Square) -> set[c.Square]:
-    knight_tables = _singleton_attack_tables.knight_tables
-    return knight_tables[square.value]
+def pawn_attacks_bb(square_index: int, color: c.Color) -> int:
+    white_tables, black_tables = _singleton_attack_tables.pawn_bb_tables
+    if color == c.Color.WHITE:
+        return white_tables[square_index]
+    else:
+        return black_tables[square_index]
+
+
+def knight_attacks_bb(square_index: int) -> int:
+    return _singleton_attack_tables.knight_bb_tables[square_index]
+
 
+def king_attacks_bb(square_index: int) -> int:
+    return _singleton_attack_tables.king_bb_tables[square_index]
 
-def _generate_queen_attacks(blockers: cb.Board, square: c.Square) -> set[c.Square]:
-    return _generate_bishop_attacks(blockers, square) | _generate_rook_attacks(
-        blockers, square
+
+def rook_attacks_bb(square_index: int, occupancy: int) -> int:
+    entry = _singleton_attack_tables.rook_magic_tables[square_index]
+    return entry.attacks[
+        (((occupancy & entry.mask) * entry.magic) & bb.FULL) >> entry.shift
+    ]
+
+
+def bishop_attacks_bb(square_index: int, occupancy: int) -> int:
+    entry = _singleton_attack_tables.bishop_magic_tables[square_index]
+    return entry.attacks[
+        (((occupancy & entry.mask) * entry.magic) & bb.FULL) >> entry.shift
+    ]
+
+
+def queen_attacks_bb(square_index: int, occupancy: int) -> int:
+    return rook_attacks_bb(square_index, occupancy) | bishop_attacks_bb(
+        square_index, occupancy
     )
 
 
-def _generate_king_attacks_precalc(square: c.Square) -> set[c.Square]:
-    king_tables = _singleton_attack_tables.king_tables
-    return king_tables[square.value]
+def between_bb(square_index1: int, square_index2: int) -> int:
+    """
+    Get the squares strictly between the two given squares if they share a rank, file
+    or diagonal. Otherwise, the result is empty.
+    """
+
+    rank1, file1 = divmod(square_index1, 8)
+    rank2, file2 = divmod(square_index2, 8)
+    if rank1 == rank2 or file1 == file2:
+        return rook_attacks_bb(square_index1, 1 << square_index2) & rook_attacks_bb(
+            square_index2, 1 << square_index1
+        )
+    if abs(rank1 - rank2) == abs(file1 - file2):
+        return bishop_attacks_bb(square_index1, 1 << square_index2) & bishop_attacks_bb(
+            square_index2, 1 << square_index1
+        )
+    return bb.EMPTY
+
+
+def generate_attacks_bb(blockers: cb.Board, square: c.Square, piece: c.Piece) -> int:
+    """
+    Same as `generate_attacks`, but the attacks are returned as a bitboard.
+    """
+
+    match piece.ptype:
+        case c.Type.PAWN:
+            return pawn_attacks_bb(square.value, piece.color)
+        case c.Type.KNIGHT:
+            return knight_attacks_bb(square.value)
+        case c.Type.KING:
+            return king_attacks_bb(square.value)
+        case c.Type.ROOK:
+            return rook_attacks_bb(square.value, blockers.get_occupancy_bb())
+        case c.Type.BISHOP:
+            return bishop_attacks_bb(square.value, blockers.get_occupancy_bb())
+        case c.Type.QUEEN:
+            return queen_attacks_bb(square.value, blockers.get_occupancy_bb())
 
 
 def generate_attacks(
@@ -250,13 +547,6 @@ def generate_attacks(
     - Pawn is the only piece in which `piece.color` matters.
     """
 
-    # TODO (perf): We will probably need to switch to a bitboard implementation to
-    # precalc for sliding pieces. Without bitboards, we would probably not gain too
-    # much performance (I haven't tested, but I believe we would need a huge iter
-    # effort to empty the irrelevant blockers (in respect to the relevant occupancy),
-    # effectively making it not too much different (if not worse) to what we already
-    # have performance-wise).
-
     match piece.ptype:
         case c.Type.PAWN:
             return _generate_pawn_attacks_precalc(square, piece)
@@ -264,9 +554,5 @@ def generate_attacks(
             return _generate_knight_attacks_precalc(square)
         case c.Type.KING:
             return _generate_king_attacks_precalc(square)
-        case c.Type.ROOK:
-            return _generate_rook_attacks(blockers, square)
-        case c.Type.BISHOP:
-            return _generate_bishop_attacks(blockers, square)
-        case c.Type.QUEEN:
-            return _generate_queen_attacks(blockers, square)
+        case c.Type.ROOK | c.Type.BISHOP | c.Type.QUEEN:
+            return bb.to_squares(generate_attacks_bb(blockers, square, piece))
@@ -0,0 +1,64 @@
+"""
+Helpers for bitboards: 64-bit integers in which bit `i` is set if, and only if, the
+square whose value is `i` (see `c.Square`) belongs to the set.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+import chessy.core as c
+
+EMPTY = 0
+FULL = (1 << 64) - 1
+
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+# Building a `c.Square` through its constructor is surprisingly slow, so index this
+# tuple instead.
+SQUARES = tuple(c.Square)
+
+
+def from_square(square: c.Square) -> int:
+    return 1 << square.value
+
+
+def from_squares(squares: Iterable[c.Square]) -> int:
+    result = EMPTY
+    for square in squares:
+        result |= 1 << square.value
+    return result
+
+
+def lsb(bb: int) -> int:
+    """
+    Get the index of the least significant set bit of `bb`. `bb` must not be empty.
+    """
+
+    assert bb != EMPTY
+    return (bb & -bb).bit_length() - 1
+
+
+def iter_indexes(bb: int) -> Iterator[int]:
+    """Yield the index of every set bit in `bb`, from the least significant one."""
+
+    while bb:
+        lowest = bb & -bb
+        yield lowest.bit_length() - 1
+        bb ^= lowest
+
+
+def to_squares(bb: int) -> set[c.Square]:
+    return {SQUARES[i] for i in iter_indexes(bb)}
+
+
+def popcount(bb: int) -> int:
+    return bb.bit_count()
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import struct
 from collections.abc import Iterable
-from copy import copy
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass, field
+from typing import ClassVar
 
 import chessy.core as c
 import chessy.core.atkgen as ca
+import chessy.core.bitboard as bb
 import chessy.core.fen_parser as cf
+import chessy.core.movecode as cmc
 import chessy.core.movegen as cm
+import chessy.core.piececode as cpc
+import chessy.core.zobrist as zb
 
 BOARD_SIZE = 64
+INITIAL_POSITION_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
 
 class BoardError(Exception):
@@ -28,44 +34,123 @@ class UnreachablePositionError(BoardError):
     pass
 
 
-@dataclass(frozen=True, slots=True)
-class _MoveResult:
-    moved_piece: c.Piece
-    maybe_captured_piece: c.Piece | None
-    is_en_passant: bool
-    is_castling: bool
-
-
-@dataclass(frozen=True, slots=True)
-class _RollbackableMove:
-    move: c.Move
-    move_result: _MoveResult
-    previous_castling_availability: c.CastlingAvailability
-    previous_halfmove_clock: int
-    previous_fullmove_number: int
-    previous_en_passant_target: c.Square | None
+# Every entry of `Board._previous_moves` packs everything needed to unmake a move into
+# a single integer, from the least significant bits: the Zobrist key before the move,
+# the move (see `cmc`), the captured piece code (see `cpc`), the castling rights (see
+# `c.CastlingAvailability.to_mask`), the en passant target (its value plus one, or 0
+# if there was none) and the halfmove clock. The rest of the previous state can be
+# deduced from the current one.
+_undo_move_shift = 64
+_undo_captured_shift = _undo_move_shift + 16
+_undo_castling_shift = _undo_captured_shift + 4
+_undo_en_passant_shift = _undo_castling_shift + 4
+_undo_halfmove_shift = _undo_en_passant_shift + 7
+_undo_key_mask = (1 << _undo_move_shift) - 1
+
+
+# Maps the king's target square of every castling to the source and target squares of
+# its rook.
+_castling_rook_moves = {
+    c.Square.g1.value: (c.Square.h1.value, c.Square.f1.value),
+    c.Square.c1.value: (c.Square.a1.value, c.Square.d1.value),
+    c.Square.g8.value: (c.Square.h8.value, c.Square.f8.value),
+    c.Square.c8.value: (c.Square.a8.value, c.Square.d8.value),
+}
+# Layout of `Board.to_bytes`: the piece codes of the 64 squares packed in nibbles
+# (square a1 in the low nibble of the first byte), the color index of the side to move
+# in bit 0 followed by the castling rights, the en passant target (its value plus one,
+# or 0 if there is none), then the halfmove clock and the fullmove number.
+_snapshot_format = struct.Struct(f"<{BOARD_SIZE // 2}sBBHH")
+_valid_piece_codes = frozenset(
+    code for code in range(cpc.LIMIT) if cpc.to_piece(code) is not None
+) | {cpc.EMPTY}
+
+# The FEN letter of every piece code, and the FEN castling availability field of every
+# castling rights mask.
+_fen_piece_letters = [
+    "" if piece is None else piece.to_letter()
+    for piece in map(cpc.to_piece, range(cpc.LIMIT))
+]
+_fen_castling_fields = [
+    "".join(letter for bit, letter in enumerate("KQkq") if mask & (1 << bit)) or "-"
+    for mask in range(16)
+]
+
+# The castling rights that are lost when a rook leaves or is captured on each square,
+# indexed by square value.
+_corner_castling_rights = [
+    {
+        c.Square.h1: 0b0001,
+        c.Square.a1: 0b0010,
+        c.Square.h8: 0b0100,
+        c.Square.a8: 0b1000,
+    }.get(square, 0)
+    for square in c.Square
+]
+# The castling rights of each color, indexed by color index.
+_color_castling_rights = (0b0011, 0b1100)
 
 
 @dataclass(slots=True)
 class Board:
-    _state: list[c.Piece | None]
+    placement: InitVar[list[c.Piece | None]]
     active_color: c.Color
-    castling_availability: c.CastlingAvailability
+    castling: InitVar[c.CastlingAvailability]
     en_passant_target: c.Square | None
     halfmove_clock: int
     fullmove_number: int
-    _previous_moves: list[_RollbackableMove] = field(default_factory=list)
-
-    def __post_init__(self) -> None:
-        self._validate_current_position()
-
-    def _validate_current_position(self) -> None:
+    # See `_undo_move_shift`.
+    _previous_moves: list[int] = field(default_factory=list)
+    # As built by `c.CastlingAvailability.to_mask`.
+    _castling_rights: int = field(init=False)
+    # The piece code (see `cpc`) on each square, indexed by square value. Built from
+    # `placement`.
+    _state: list[int] = field(init=False)
+    # Bitboard view of `_state`, kept in sync by `_set_piece`. Indexed by piece code
+    # and color index respectively.
+    _pieces_bbs: list[int] = field(init=False, repr=False, compare=False)
+    _colors_bbs: list[int] = field(init=False, repr=False, compare=False)
+    # Number of pieces of each kind, indexed by piece code, and the square of each
+    # king (None if there is no king of that color), indexed by color index. Also
+    # kept in sync by `_set_piece`.
+    _piece_counts: list[int] = field(init=False, repr=False, compare=False)
+    _king_squares: list[int | None] = field(init=False, repr=False, compare=False)
+    # 64-bit Zobrist hash of the position, updated incrementally by every move.
+    zobrist_key: int = field(init=False, repr=False, compare=False)
+
+    # If enabled, every (un)make recomputes `zobrist_key` from scratch and asserts it
+    # matches the incrementally updated value. Very slow, only meant for debugging.
+    verify_zobrist_key: ClassVar[bool] = False
+    # If enabled, `make_legal_move` validates its moves like `make_move` does. Only
+    # meant for debugging, since it defeats the purpose of `make_legal_move`.
+    verify_legal_moves: ClassVar[bool] = False
+
+    def __post_init__(
+        self, placement: list[c.Piece | None], castling: c.CastlingAvailability
+    ) -> None:
+        self._validate_current_position(placement)
+        self._castling_rights = castling.to_mask()
+        self._init_piece_tracking([cpc.from_piece(piece) for piece in placement])
+        self.zobrist_key = self._compute_zobrist_key()
+
+    def _init_piece_tracking(self, placement: list[int]) -> None:
+        self._state = [cpc.EMPTY] * BOARD_SIZE
+        self._pieces_bbs = [bb.EMPTY] * cpc.LIMIT
+        self._colors_bbs = [bb.EMPTY] * len(c.Color)
+        self._piece_counts = [0] * cpc.LIMIT
+        self._king_squares = [None] * len(c.Color)
+        # The Zobrist key is computed from scratch afterwards.
+        self.zobrist_key = 0
+        for i, piece in enumerate(placement):
+            self._set_piece(i, piece)
+
+    def _validate_current_position(self, placement: list[c.Piece | None]) -> None:
         def assert_position_cond(cond: bool, message: str) -> None:
             if not cond:
                 raise UnreachablePositionError(message)
 
         assert_position_cond(
-            (stlen := len(self._state)) == BOARD_SIZE,
+            (stlen := len(placement)) == BOARD_SIZE,
             f"Board has invalid size {stlen}, expected {BOARD_SIZE}",
         )
 
@@ -90,15 +175,17 @@ class Board:
         #   positions.
 
     @staticmethod
-    def from_fen(fen: str) -> Board:
+    def from_fen(fen: str, *, trusted: bool = False) -> Board:
         """
         Create a board from the given FEN.
 
         Can raise multiple exceptions: `UnreachablePositionError` or any sub-class
         of `FenValidationError`.
+
+        See `cf.parse` for `trusted`.
         """
 
-        result = cf.parse(fen)
+        result = cf.parse(fen, trusted=trusted)
 
         return Board(
             result.piece_placement,
@@ -109,222 +196,384 @@ class Board:
             result.fullmove_number,
         )
 
-    def get_piece_by_square(self, square: c.Square) -> c.Piece | None:
-        return self._state[square.value]
+    @property
+    def castling_availability(self) -> c.CastlingAvailability:
+        """
+        Get which castlings are still allowed. The result is a copy: changing it does
+        not affect the board.
+        """
 
-    def _set_piece_by_square(self, square: c.Square, piece: c.Piece | None) -> None:
-        self._state[square.value] = piece
+        return c.CastlingAvailability.from_mask(self._castling_rights)
 
-    def _get_king_position_by_color(self, color: c.Color) -> c.Square:
-        king_position: c.Square | None = None
-        for i, p in enumerate(self._state):
-            if p is not None and p.ptype == c.Type.KING and p.color == color:
-                king_position = c.Square(i)
-                break
-        assert king_position is not None
-        return king_position
+    @property
+    def castling_rights(self) -> int:
+        """Same as `castling_availability`, but packed by `to_mask`."""
+        return self._castling_rights
 
-    def is_in_check(self, color: c.Color | None = None) -> bool:
+    def to_fen(self) -> str:
+        """
+        Create the FEN of the current position. It can be parsed back with
+        `from_fen(..., trusted=True)`.
         """
-        Verify if the `color` is currently in check.
 
-        If `color` is None, the verification is based on `self.active_color`.
+        state = self._state
+        ranks = []
+        for rank_start in range(BOARD_SIZE - 8, -1, -8):
+            rank = ""
+            empty = 0
+            for piece in state[rank_start : rank_start + 8]:
+                if piece:
+                    if empty:
+                        rank += str(empty)
+                        empty = 0
+                    rank += _fen_piece_letters[piece]
+                else:
+                    empty += 1
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        active_color = "w" if self.active_color is c.Color.WHITE else "b"
+        en_passant = (
+            "-" if self.en_passant_target is None else self.en_passant_target.name
+        )
+        return (
+            f"{'/'.join(ranks)} {active_color} "
+            f"{_fen_castling_fields[self._castling_rights]} {en_passant} "
+            f"{self.halfmove_clock} {self.fullmove_number}"
+        )
+
+    def clone(self) -> Board:
+        """
+        Create an independent copy of the board, including its move history. Much
+        cheaper than going through a FEN or `copy.deepcopy`.
         """
 
-        if color is None:
-            color = self.active_color
+        result = Board.__new__(Board)
+        result.active_color = self.active_color
+        result.en_passant_target = self.en_passant_target
+        result.halfmove_clock = self.halfmove_clock
+        result.fullmove_number = self.fullmove_number
+        result._previous_moves = self._previous_moves.copy()
+        result._castling_rights = self._castling_rights
+        result._state = self._state.copy()
+        result._pieces_bbs = self._pieces_bbs.copy()
+        result._colors_bbs = self._colors_bbs.copy()
+        result._piece_counts = self._piece_counts.copy()
+        result._king_squares = self._king_squares.copy()
+        result.zobrist_key = self.zobrist_key
+        return result
 
-        king_position = self._get_king_position_by_color(color)
-        possible_attackers_positions = ca.generate_attacks(
-            self, king_position, c.Piece(c.Type.QUEEN, color)
-        ) | ca.generate_attacks(self, king_position, c.Piece(c.Type.KNIGHT, color))
-        for position in possible_attackers_positions:
-            if (
-                (attacker := self._state[position.value]) is not None
-                and attacker.color == color.invert()
-                # TODO (perf): We don't need to generate every single attack, but rather
-                # just the ones that are likely to attack `king_position`.
-                and king_position in ca.generate_attacks(self, position, attacker)
-            ):
-                return True
+    def to_bytes(self) -> bytes:
+        """
+        Create a compact (38 bytes) snapshot of the position, meant to be sent to
+        other processes. The move history is not included.
 
-        return False
+        The clocks must fit in 16 bits, otherwise `struct.error` is raised.
+        """
 
-    def _validate_move(self, move: c.Move) -> None:
-        legal_moves = cm.generate_legal_moves(self, move.source)
+        state = self._state
+        return _snapshot_format.pack(
+            bytes(state[i] | state[i + 1] << 4 for i in range(0, BOARD_SIZE, 2)),
+            cpc.color_index(self.active_color) | self._castling_rights << 1,
+            0 if self.en_passant_target is None else self.en_passant_target.value + 1,
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
 
-        if move not in legal_moves:
-            raise IllegalMoveError(
-                f"Move from {move.source} to {move.target} is illegal. "
-                f"See `legal_moves` for available moves starting from {move.source}.",
-                legal_moves,
-            )
+    @staticmethod
+    def from_bytes(data: bytes) -> Board:
+        """
+        Create a board from a snapshot made by `to_bytes`.
 
-    def _move_is_castling(self, move: c.Move) -> bool:
-        initial_white_king_position = c.Square.e1
-        initial_black_king_position = c.Square.e8
-        white_king_castling_targets = {c.Square.g1, c.Square.c1}
-        black_king_castling_targets = {c.Square.g8, c.Square.c8}
+        ValueError is raised if `data` is not a valid snapshot.
+        """
 
-        return (
-            (source_piece := self.get_piece_by_square(move.source)) is not None
-            and source_piece.ptype == c.Type.KING
-            and (
-                (
-                    move.source == initial_white_king_position
-                    and move.target in white_king_castling_targets
-                )
-                or (
-                    move.source == initial_black_king_position
-                    and move.target in black_king_castling_targets
-                )
+        try:
+            placement, flags, en_passant_value, halfmove_clock, fullmove_number = (
+                _snapshot_format.unpack(data)
             )
+        except struct.error as e:
+            raise ValueError(f"Invalid board snapshot: {e}") from None
+
+        codes = [code for byte in placement for code in (byte & 0xF, byte >> 4)]
+        if not _valid_piece_codes.issuperset(codes):
+            raise ValueError("Invalid board snapshot: unknown piece code")
+        if flags >> 1 >= len(zb.CASTLING_KEYS):
+            raise ValueError("Invalid board snapshot: unknown castling rights")
+        if en_passant_value > len(bb.SQUARES):
+            raise ValueError("Invalid board snapshot: unknown en passant square")
+        if fullmove_number < 1:
+            raise ValueError("Invalid board snapshot: fullmove number must be >= 1")
+
+        result = Board.__new__(Board)
+        result.active_color = cpc.COLORS[flags & 1]
+        result.en_passant_target = (
+            bb.SQUARES[en_passant_value - 1] if en_passant_value else None
         )
+        result.halfmove_clock = halfmove_clock
+        result.fullmove_number = fullmove_number
+        result._previous_moves = []
+        result._castling_rights = flags >> 1
+        result._init_piece_tracking(codes)
+        result.zobrist_key = result._compute_zobrist_key()
+        return result
+
+    def get_piece_by_square(self, square: c.Square) -> c.Piece | None:
+        return cpc.to_piece(self._state[square.value])
+
+    def get_piece_code(self, square_index: int) -> int:
+        """Same as `get_piece_by_square`, but with integers (see `cpc`)."""
+        return self._state[square_index]
+
+    def _compute_zobrist_key(self) -> int:
+        key = 0
+        for i, piece in enumerate(self._state):
+            if piece:
+                key ^= zb.PIECE_SQUARE_KEYS[piece][i]
+        return key ^ self._non_placement_zobrist_key()
 
-    def _move_is_en_passant(self, move: c.Move) -> bool:
+    def _non_placement_zobrist_key(self) -> int:
         return (
-            # If we are moving a pawn to an en passant target, we can't possibly
-            # have anything other than an en passant. Otherwise, a double pawn push
-            # could not have happened.
-            (source_piece := self.get_piece_by_square(move.source)) is not None
-            and source_piece.ptype == c.Type.PAWN
-            and self.en_passant_target is not None
-            and move.target == self.en_passant_target
+            zb.castling_key(self._castling_rights)
+            ^ zb.en_passant_key(self.en_passant_target)
+            ^ zb.active_color_key(self.active_color)
         )
 
-    def _make_move__state_target_update_by_promotion(self, move: c.Move) -> None:
-        source_piece = self.get_piece_by_square(move.source)
+    def _assert_zobrist_key_if_verifying(self) -> None:
+        if self.verify_zobrist_key:
+            expected = self._compute_zobrist_key()
+            assert (
+                self.zobrist_key == expected
+            ), f"Zobrist key {self.zobrist_key:#x} drifted, expected {expected:#x}"
+
+    def get_pieces_bb(self, ptype: c.Type, color: c.Color) -> int:
+        """Get the bitboard of all pieces of type `ptype` and color `color`."""
+        return self._pieces_bbs[cpc.encode(ptype.value, cpc.color_index(color))]
+
+    def get_pieces_bb_by_code(self, piece: int) -> int:
+        """Same as `get_pieces_bb`, but with a piece code (see `cpc`)."""
+        return self._pieces_bbs[piece]
+
+    def get_color_bb(self, color: c.Color) -> int:
+        """Get the bitboard of all pieces of color `color`."""
+        return self._colors_bbs[cpc.color_index(color)]
+
+    def get_color_bb_by_index(self, color_index: int) -> int:
+        """Same as `get_color_bb`, but with a color index (see `cpc`)."""
+        return self._colors_bbs[color_index]
+
+    def get_occupancy_bb(self) -> int:
+        """Get the bitboard of all occupied squares."""
+        return self._colors_bbs[0] | self._colors_bbs[1]
+
+    def get_piece_count(self, ptype: c.Type, color: c.Color) -> int:
+        """Get the number of pieces of type `ptype` and color `color`."""
+        return self._piece_counts[cpc.encode(ptype.value, cpc.color_index(color))]
+
+    def get_king_square(self, color: c.Color) -> c.Square:
+        """Get the square of the king of color `color`, which must be on the board."""
+
+        i = self._king_squares[cpc.color_index(color)]
+        assert i is not None
+        return bb.SQUARES[i]
+
+    def _set_piece(self, i: int, piece: int) -> None:
+        """
+        Put the piece code `piece` (which may be `cpc.EMPTY`) on the square of value
+        `i`, replacing whatever was there.
+        """
+
+        mask = 1 << i
+
+        if previous := self._state[i]:
+            previous_color = previous >> cpc.COLOR_SHIFT
+            self._pieces_bbs[previous] ^= mask
+            self._colors_bbs[previous_color] ^= mask
+            self.zobrist_key ^= zb.PIECE_SQUARE_KEYS[previous][i]
+            self._piece_counts[previous] -= 1
+            if (
+                previous & cpc.TYPE_MASK == cpc.KING
+                and self._king_squares[previous_color] == i
+            ):
+                self._king_squares[previous_color] = None
+        if piece:
+            color = piece >> cpc.COLOR_SHIFT
+            self._pieces_bbs[piece] |= mask
+            self._colors_bbs[color] |= mask
+            self.zobrist_key ^= zb.PIECE_SQUARE_KEYS[piece][i]
+            self._piece_counts[piece] += 1
+            if piece & cpc.TYPE_MASK == cpc.KING:
+                self._king_squares[color] = i
+
+        self._state[i] = piece
+
+    def attackers_to(
+        self, square: c.Square, color: c.Color, occupancy: int | None = None
+    ) -> int:
+        """
+        Get a bitboard of the pieces of `color` attacking `square`.
 
-        assert source_piece is not None
-        assert move.promotion is not None
+        Sliders are blocked by the pieces in `occupancy`, which defaults to the
+        current occupancy. Passing a different one allows asking about positions that
+        are a few pieces away from the current one (e.g. with a piece removed).
+        """
 
-        self._set_piece_by_square(
-            move.target, c.Piece(color=source_piece.color, ptype=move.promotion)
+        return self.attackers_to_index(
+            square.value,
+            cpc.color_index(color),
+            self.get_occupancy_bb() if occupancy is None else occupancy,
         )
 
-    def _make_move__state_target_and_rook_update_by_castling(
-        self, move: c.Move
-    ) -> None:
-        source_piece = self.get_piece_by_square(move.source)
-        assert source_piece is not None
-
-        previous_rook_positions_by_move_target = {
-            # White
-            c.Square.g1: c.Square.h1,
-            c.Square.c1: c.Square.a1,
-            # Black
-            c.Square.g8: c.Square.h8,
-            c.Square.c8: c.Square.a8,
-        }
-        assert move.target in previous_rook_positions_by_move_target
-
-        new_rook_positions_by_move_target = {
-            # White
-            c.Square.g1: c.Square.f1,
-            c.Square.c1: c.Square.d1,
-            # Black
-            c.Square.g8: c.Square.f8,
-            c.Square.c8: c.Square.d8,
-        }
-
-        previous_rook_position = previous_rook_positions_by_move_target[move.target]
-        self._set_piece_by_square(move.target, source_piece)
-        self._set_piece_by_square(
-            new_rook_positions_by_move_target[move.target],
-            self.get_piece_by_square(previous_rook_position),
+    def attackers_to_index(
+        self, square_index: int, color_index: int, occupancy: int
+    ) -> int:
+        """Same as `attackers_to`, but with integers (see `cpc`)."""
+
+        i = square_index
+        pieces = self._pieces_bbs
+        offset = color_index << cpc.COLOR_SHIFT
+        queens = pieces[offset | cpc.QUEEN]
+        return (
+            # A pawn attacks the square if an enemy pawn there would attack it back.
+            (
+                ca.pawn_attacks_bb(i, cpc.COLORS[color_index ^ 1])
+                & pieces[offset | cpc.PAWN]
+            )
+            | (ca.knight_attacks_bb(i) & pieces[offset | cpc.KNIGHT])
+            | (ca.king_attacks_bb(i) & pieces[offset | cpc.KING])
+            | (
+                ca.bishop_attacks_bb(i, occupancy)
+                & (pieces[offset | cpc.BISHOP] | queens)
+            )
+            | (ca.rook_attacks_bb(i, occupancy) & (pieces[offset | cpc.ROOK] | queens))
         )
-        self._set_piece_by_square(previous_rook_position, None)
 
-    def _make_move__state_target_update_by_en_passant(self, move: c.Move) -> c.Piece:
+    def is_square_attacked(self, square: c.Square, by_color: c.Color) -> bool:
         """
-        Return whatever piece was captured when performing the en passant.
+        Same as checking whether `attackers_to` is empty, but stops as soon as an
+        attacker is found.
         """
 
-        source_piece = self.get_piece_by_square(move.source)
-        assert self.en_passant_target is not None
-        assert source_piece is not None
+        i = square.value
+        pieces = self._pieces_bbs
+        color_index = cpc.color_index(by_color)
+        offset = color_index << cpc.COLOR_SHIFT
+        if (
+            ca.pawn_attacks_bb(i, cpc.COLORS[color_index ^ 1])
+            & pieces[offset | cpc.PAWN]
+            or ca.knight_attacks_bb(i) & pieces[offset | cpc.KNIGHT]
+            or ca.king_attacks_bb(i) & pieces[offset | cpc.KING]
+        ):
+            return True
+
+        occupancy = self.get_occupancy_bb()
+        queens = pieces[offset | cpc.QUEEN]
+        return bool(
+            ca.bishop_attacks_bb(i, occupancy) & (pieces[offset | cpc.BISHOP] | queens)
+            or ca.rook_attacks_bb(i, occupancy) & (pieces[offset | cpc.ROOK] | queens)
+        )
 
-        direction_factor = -1 * source_piece.direction_factor()
-        single_step = 8 * direction_factor
-        captured_square = c.Square(self.en_passant_target.value + single_step)
-        captured_piece = self.get_piece_by_square(captured_square)
-        assert captured_piece is not None
+    def is_in_check(self, color: c.Color | None = None) -> bool:
+        """
+        Verify if the `color` is currently in check.
 
-        self._set_piece_by_square(move.target, source_piece)
-        self._set_piece_by_square(captured_square, None)
-        return captured_piece
+        If `color` is None, the verification is based on `self.active_color`.
+        """
 
-    def _make_move__state_update(self, move: c.Move) -> _MoveResult:
-        captured_piece = self.get_piece_by_square(move.target)
-        source_piece = self.get_piece_by_square(move.source)
-        assert source_piece is not None
+        if color is None:
+            color = self.active_color
 
-        is_promotion = move.promotion is not None
-        is_castling = self._move_is_castling(move)
-        is_en_passant = self._move_is_en_passant(move)
+        return self.is_square_attacked(self.get_king_square(color), color.invert())
 
-        if is_promotion:
-            self._make_move__state_target_update_by_promotion(move)
+    def _validate_move(self, move: int) -> None:
+        source = bb.SQUARES[cmc.source(move)]
+        if move not in cm.generate_legal_move_codes(self, source):
+            decoded_move = cmc.to_move(move)
+            raise IllegalMoveError(
+                f"Move from {source} to {decoded_move.target} is illegal. "
+                f"See `legal_moves` for available moves starting from {source}.",
+                cm.generate_legal_moves(self, source),
+            )
+
+    def _make_move__state_update(
+        self, moved_piece: int, source: int, target: int, promotion: c.Type | None
+    ) -> int:
+        """Move the pieces around, and return the code of the captured piece."""
+
+        captured_piece = self._state[target]
+        ptype = moved_piece & cpc.TYPE_MASK
+        is_castling = ptype == cpc.KING and abs(target - source) == 2  # noqa: PLR2004
+        is_en_passant = (
+            ptype == cpc.PAWN
+            and self.en_passant_target is not None
+            and target == self.en_passant_target.value
+        )
+
+        if promotion is not None:
+            self._set_piece(
+                target, cpc.encode(promotion.value, moved_piece >> cpc.COLOR_SHIFT)
+            )
         elif is_castling:
-            self._make_move__state_target_and_rook_update_by_castling(move)
+            self._set_piece(target, moved_piece)
+            rook_source, rook_target = _castling_rook_moves[target]
+            self._set_piece(rook_target, self._state[rook_source])
+            self._set_piece(rook_source, cpc.EMPTY)
         elif is_en_passant:
-            captured_piece = self._make_move__state_target_update_by_en_passant(move)
+            # The captured pawn is right behind the target, from the mover's view.
+            captured_square = (
+                target - 8
+                if moved_piece >> cpc.COLOR_SHIFT == cpc.WHITE
+                else target + 8
+            )
+            captured_piece = self._state[captured_square]
+            assert captured_piece
+            self._set_piece(target, moved_piece)
+            self._set_piece(captured_square, cpc.EMPTY)
         else:
-            self._set_piece_by_square(move.target, source_piece)
+            self._set_piece(target, moved_piece)
 
-        self._set_piece_by_square(move.source, None)
+        self._set_piece(source, cpc.EMPTY)
 
-        return _MoveResult(source_piece, captured_piece, is_en_passant, is_castling)
+        return captured_piece
 
     def _update_castling_availability_after_move(
-        self, moved_piece: c.Piece, move_source: c.Square, move_target: c.Square
+        self, moved_piece: int, move_source: int, move_target: int
     ) -> None:
-        self.castling_availability.disable_for_square(move_target)
-        if moved_piece.ptype == c.Type.KING:
-            self.castling_availability.disable_for_color(moved_piece.color)
-        elif moved_piece.ptype == c.Type.ROOK:
-            self.castling_availability.disable_for_square(move_source)
+        # A rook being captured on its initial square.
+        lost_rights = _corner_castling_rights[move_target]
+
+        ptype = moved_piece & cpc.TYPE_MASK
+        if ptype == cpc.KING:
+            lost_rights |= _color_castling_rights[moved_piece >> cpc.COLOR_SHIFT]
+        elif ptype == cpc.ROOK:
+            lost_rights |= _corner_castling_rights[move_source]
+
+        self._castling_rights &= ~lost_rights
 
     def _update_en_passant_target_after_move(
-        self, moved_piece: c.Piece, performed_move: c.Move
+        self, moved_piece: int, move_source: int, move_target: int
     ) -> None:
         self.en_passant_target = None
-        if moved_piece.ptype != c.Type.PAWN:
+        if (
+            moved_piece & cpc.TYPE_MASK != cpc.PAWN
+            or abs(move_target - move_source) != 16  # noqa: PLR2004
+        ):
             return
 
-        direction_factor = moved_piece.direction_factor()
-        single_step = 8 * direction_factor
-        double_step = 2 * single_step
-        did_double_push = (
-            performed_move.source.value + double_step == performed_move.target.value
-        )
-
-        if not did_double_push:
-            return
-
-        en_passant_square = c.Square(performed_move.source.value + single_step)
-        target_file = performed_move.target.file()
-        for offset in [-1, 1]:
-            # If we are at an edge file, prevent wrapping around the board.
-            if 0 <= target_file + offset <= c.Square.last_file():
-                neighbor = self.get_piece_by_square(
-                    c.Square(performed_move.target.value + offset)
-                )
-                if (
-                    neighbor
-                    and neighbor.ptype == c.Type.PAWN
-                    and neighbor.color == moved_piece.color.invert()
-                ):
-                    self.en_passant_target = en_passant_square
-                    return
+        # Only allow en passant if there is an enemy pawn able to capture.
+        target_bb = 1 << move_target
+        neighbors = ((target_bb << 1) & ~bb.FILE_A) | ((target_bb >> 1) & ~bb.FILE_H)
+        enemy_pawn = cpc.encode(cpc.PAWN, (moved_piece >> cpc.COLOR_SHIFT) ^ 1)
+        if neighbors & self._pieces_bbs[enemy_pawn]:
+            self.en_passant_target = bb.SQUARES[(move_source + move_target) // 2]
 
     def _update_board_clocks_after_move(
-        self, moved_piece: c.Piece, move_was_capture: bool
+        self, moved_piece: int, move_was_capture: bool
     ) -> None:
-        is_halfmove_reset = move_was_capture or moved_piece.ptype == c.Type.PAWN
-        is_fullcount_increment = moved_piece.color == c.Color.BLACK
+        is_halfmove_reset = move_was_capture or moved_piece & cpc.TYPE_MASK == cpc.PAWN
         self.halfmove_clock = 0 if is_halfmove_reset else self.halfmove_clock + 1
-        if is_fullcount_increment:
+        if moved_piece >> cpc.COLOR_SHIFT == cpc.BLACK:
             self.fullmove_number += 1
 
     def make_move(self, move: c.Move, *, bypass_validation: bool = False) -> None:
@@ -340,79 +589,80 @@ class Board:
         to figure out that the move is pseudolegal.
         """
 
+        self.make_move_code(cmc.from_move(move), bypass_validation=bypass_validation)
+
+    def make_move_code(self, move: int, *, bypass_validation: bool = False) -> None:
+        """
+        Same as `make_move`, but the move is encoded as in `cmc`.
+        """
+
         if not bypass_validation:
             self._validate_move(move)
+        self.make_legal_move(move)
+
+    def make_legal_move(self, move: int) -> None:
+        """
+        Perform the move (encoded as in `cmc`) without validating it, which is what
+        the search and perft need: their moves come straight from `cm` (or are checked
+        against it), so validating them again would generate every move twice.
+
+        The move must be legal, otherwise the board is left in a bad state. Moves
+        coming from anywhere else (e.g. the user) must go through `make_move`.
+        """
 
-        move_result = self._make_move__state_update(move)
-        moved_piece = move_result.moved_piece
-        is_capture = move_result.maybe_captured_piece is not None
+        if self.verify_legal_moves:
+            self._validate_move(move)
+
+        source, target = cmc.source(move), cmc.target(move)
+        moved_piece = self._state[source]
+        assert moved_piece
+        previous_state = self._undo_record(move)
+
+        # Piece placement keys are updated by `_set_piece`. The remaining ones are
+        # removed here, and added back once the state is updated.
+        self.zobrist_key ^= self._non_placement_zobrist_key()
+        captured_piece = self._make_move__state_update(
+            moved_piece, source, target, cmc.promotion(move)
+        )
         self._previous_moves.append(
-            _RollbackableMove(
-                move,
-                move_result,
-                copy(self.castling_availability),
-                self.halfmove_clock,
-                self.fullmove_number,
-                self.en_passant_target,
-            )
+            previous_state | captured_piece << _undo_captured_shift
         )
 
-        self._update_castling_availability_after_move(
-            moved_piece, move.source, move.target
-        )
-        self._update_en_passant_target_after_move(moved_piece, move)
-        self._update_board_clocks_after_move(moved_piece, is_capture)
+        self._update_castling_availability_after_move(moved_piece, source, target)
+        self._update_en_passant_target_after_move(moved_piece, source, target)
+        self._update_board_clocks_after_move(moved_piece, captured_piece != cpc.EMPTY)
+        self.active_color = cpc.COLORS[(moved_piece >> cpc.COLOR_SHIFT) ^ 1]
+        self.zobrist_key ^= self._non_placement_zobrist_key()
+        self._assert_zobrist_key_if_verifying()
+
+    def make_null_move(self) -> None:
+        """
+        Pass the turn to the opponent without moving anything, as needed by null-move
+        pruning. The side to move must not be in check, since the resulting position
+        would not be legal.
+
+        Undone by `unmake_null_move` (or `unmake_move`).
+        """
+
+        self._previous_moves.append(self._undo_record(cmc.NULL))
+        self.zobrist_key ^= self._non_placement_zobrist_key()
+        self.en_passant_target = None
+        self.halfmove_clock += 1
+        if self.active_color == c.Color.BLACK:
+            self.fullmove_number += 1
         self.active_color = self.active_color.invert()
+        self.zobrist_key ^= self._non_placement_zobrist_key()
+        self._assert_zobrist_key_if_verifying()
 
-    def _unmake_move__state_source_update(
-        self, rollbackable_move: _RollbackableMove
-    ) -> None:
-        move = rollbackable_move.move
-        moved_piece = rollbackable_move.move_result.moved_piece
-
-        # This works even for promotions because `moved_piece` points to the older
-        # piece (the pawn), not the promoted piece that was created later.
-        self._set_piece_by_square(move.source, moved_piece)
-        if rollbackable_move.move_result.is_castling:
-            rook_position_by_king_position = {
-                c.Square.g1: {"old": c.Square.f1, "new": c.Square.h1},
-                c.Square.c1: {"old": c.Square.d1, "new": c.Square.a1},
-                c.Square.g8: {"old": c.Square.f8, "new": c.Square.h8},
-                c.Square.c8: {"old": c.Square.d8, "new": c.Square.a8},
-            }
-            old = self.get_piece_by_square(
-                rook_position_by_king_position[move.target]["old"]
-            )
-            assert old is not None and old.ptype == c.Type.ROOK
-            self._set_piece_by_square(
-                rook_position_by_king_position[move.target]["old"], None
-            )
-            self._set_piece_by_square(
-                rook_position_by_king_position[move.target]["new"], old
-            )
+    def unmake_null_move(self) -> None:
+        """
+        Unmake the last move, which must be a null move (see `make_null_move`).
+        ValueError is raised otherwise.
+        """
 
-    def _unmake_move__state_target_update(
-        self, rollbackable_move: _RollbackableMove
-    ) -> None:
-        move = rollbackable_move.move
-        moved_piece = rollbackable_move.move_result.moved_piece
-
-        if rollbackable_move.move_result.is_en_passant:
-            assert rollbackable_move.previous_en_passant_target is not None
-            assert moved_piece.ptype == c.Type.PAWN
-            true_target = c.Square(
-                (-8 * moved_piece.direction_factor()) + move.target.value
-            )
-            self._set_piece_by_square(
-                true_target,
-                rollbackable_move.move_result.maybe_captured_piece,
-            )
-            self._set_piece_by_square(move.target, None)
-        else:
-            self._set_piece_by_square(
-                move.target,
-                rollbackable_move.move_result.maybe_captured_piece,
-            )
+        if self.get_last_move_code() != cmc.NULL:
+            raise ValueError("The last move is not a null move.")
+        self.unmake_move()
 
     def unmake_move(self) -> None:
         """
@@ -422,18 +672,85 @@ class Board:
         """
 
         try:
-            move_to_unmake = self._previous_moves.pop()
+            previous_state = self._previous_moves.pop()
         except IndexError:
             raise ValueError("No moves to unmake.") from None
 
-        self._unmake_move__state_source_update(move_to_unmake)
-        self._unmake_move__state_target_update(move_to_unmake)
+        move = (previous_state >> _undo_move_shift) & 0xFFFF
+        if move == cmc.NULL:
+            self._restore_undo_record(
+                previous_state, cpc.color_index(self.active_color) ^ 1
+            )
+            return
 
-        self.castling_availability = move_to_unmake.previous_castling_availability
-        self.halfmove_clock = move_to_unmake.previous_halfmove_clock
-        self.en_passant_target = move_to_unmake.previous_en_passant_target
-        self.fullmove_number = move_to_unmake.previous_fullmove_number
-        self.active_color = self.active_color.invert()
+        captured_piece = (previous_state >> _undo_captured_shift) & (cpc.LIMIT - 1)
+        en_passant_value = (previous_state >> _undo_en_passant_shift) & 0x7F
+        source, target = cmc.source(move), cmc.target(move)
+
+        color = self._state[target] >> cpc.COLOR_SHIFT
+        moved_piece = (
+            cpc.encode(cpc.PAWN, color) if cmc.promotion(move) else self._state[target]
+        )
+        ptype = moved_piece & cpc.TYPE_MASK
+        self._set_piece(source, moved_piece)
+        if ptype == cpc.KING and abs(target - source) == 2:  # noqa: PLR2004
+            rook_source, rook_target = _castling_rook_moves[target]
+            self._set_piece(rook_source, self._state[rook_target])
+            self._set_piece(rook_target, cpc.EMPTY)
+
+        if ptype == cpc.PAWN and target == en_passant_value - 1:
+            captured_square = target - 8 if color == cpc.WHITE else target + 8
+            self._set_piece(captured_square, captured_piece)
+            self._set_piece(target, cpc.EMPTY)
+        else:
+            self._set_piece(target, captured_piece)
+
+        self._restore_undo_record(previous_state, color)
+
+    def _undo_record(self, move: int) -> int:
+        """
+        Pack everything `unmake_move` cannot deduce into an entry of
+        `_previous_moves`, except for the captured piece, which is only known once
+        `move` is made.
+        """
+
+        en_passant_target = self.en_passant_target
+        return (
+            self.zobrist_key
+            | move << _undo_move_shift
+            | self._castling_rights << _undo_castling_shift
+            | (0 if en_passant_target is None else en_passant_target.value + 1)
+            << _undo_en_passant_shift
+            | self.halfmove_clock << _undo_halfmove_shift
+        )
+
+    def _restore_undo_record(self, previous_state: int, color: int) -> None:
+        """
+        Restore the state packed in `previous_state` (see `_undo_record`), other than
+        the placement, where the undone move was made by the color index `color`.
+        """
+
+        en_passant_value = (previous_state >> _undo_en_passant_shift) & 0x7F
+        self._castling_rights = (previous_state >> _undo_castling_shift) & 0xF
+        self.halfmove_clock = previous_state >> _undo_halfmove_shift
+        self.en_passant_target = (
+            bb.SQUARES[en_passant_value - 1] if en_passant_value else None
+        )
+        if color == cpc.BLACK:
+            self.fullmove_number -= 1
+        self.active_color = cpc.COLORS[color]
+        self.zobrist_key = previous_state & _undo_key_mask
+        self._assert_zobrist_key_if_verifying()
+
+    def get_last_move_code(self) -> int | None:
+        """
+        Get the last move made (encoded as in `cmc`, so `cmc.NULL` for a null move),
+        or None if there is none.
+        """
+
+        if not self._previous_moves:
+            return None
+        return (self._previous_moves[-1] >> _undo_move_shift) & 0xFFFF
 
     def make_ascii_repr(self) -> str:
         """
@@ -462,3 +779,8 @@ class Board:
             result += "\n"
 
         return result
+
+
+def boards_to_fens(boards: Iterable[Board]) -> list[str]:
+    """Create the FEN of every board in `boards`, see `Board.to_fen`."""
+    return [board.to_fen() for board in boards]
@@ -1,11 +1,80 @@
 from __future__ import annotations
 
+import logging
+import math
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import Any
 
 import chessy.core as c
+import chessy.core.bitboard as bb
 import chessy.core.board as cb
+import chessy.core.movecode as cmc
 import chessy.core.movegen as cm
+import chessy.core.movepick as cmp
+import chessy.core.piececode as cpc
+import chessy.core.see as cs
+import chessy.core.timeman as ctm
+import chessy.core.transposition as ct
+
+logger = logging.getLogger(__name__)
+
+# In quiescence search, captures that cannot bring the score within this margin of
+# alpha, even after winning the captured piece for free, are not searched.
+_DELTA_PRUNING_MARGIN = 2.0
+
+# Quiescence search only considers every move (and not just captures) when in check,
+# and only up to this many plies past the horizon, so that long (or repeating)
+# sequences of checks still end.
+_QUIESCENCE_MAX_EVASION_PLY = 8
+
+# Null-move pruning: giving the opponent a free move and still failing high means the
+# position is good enough to be cut off, after a search this much shallower. Only
+# tried from this depth on, since shallower nodes are cheap to search anyway.
+_NULL_MOVE_REDUCTION = 2
+_NULL_MOVE_MIN_DEPTH = 3
+
+# Late move reductions: quiet moves ordered late are unlikely to be good, so they are
+# first searched with a reduced depth, growing with the depth and the move index.
+_LMR_MIN_DEPTH = 3
+_LMR_MIN_MOVE_INDEX = 3
+_LMR_BASE = 0.75
+_LMR_DIVISOR = 2.25
+_LMR_TABLE_SIZE = 64
+
+
+def _build_lmr_reductions() -> list[list[int]]:
+    return [
+        [
+            int(_LMR_BASE + math.log(depth) * math.log(i) / _LMR_DIVISOR)
+            if depth and i
+            else 0
+            for i in range(_LMR_TABLE_SIZE)
+        ]
+        for depth in range(_LMR_TABLE_SIZE)
+    ]
+
+
+# Indexed by depth, then move index (both capped to the table size).
+_lmr_reductions = _build_lmr_reductions()
+
+# Quiet moves that caused cutoffs are remembered per ply (killers), per color and
+# squares (history) and per previous move (counter-moves), to be tried early in
+# similar positions. See `Evaluator._record_cutoff`.
+_KILLERS_PER_PLY = 2
+# The source and target squares of a move code, see `cmc`.
+_FROM_TO_MASK = cmc.SOURCE_MASK | cmc.TARGET_MASK
+_HISTORY_COLOR_SHIFT = 12
+
+# Aspiration windows: from this depth on, the root is first searched with a window of
+# this size (in pawns) on each side of the expected score. The side that fails is
+# widened by this factor, and dropped once wider than the maximum. Scores still move
+# a lot between shallow iterations, and failing costs more than narrow windows save,
+# hence the wide window and the late start.
+_ASPIRATION_MIN_DEPTH = 5
+_ASPIRATION_DELTA = 1.0
+_ASPIRATION_GROWTH = 2
+_ASPIRATION_MAX_DELTA = 4.0
 
 
 class EvaluationInfoReporter(ABC):
@@ -23,120 +92,768 @@ class _NilInfoReporter(EvaluationInfoReporter):
         pass
 
 
+def _above(score: float) -> float:
+    """
+    Get the smallest score greater than `score`, so that `(score, _above(score))` is a
+    null window.
+    """
+
+    return math.nextafter(score, math.inf)
+
+
+def _below(score: float) -> float:
+    """Same as `_above`, but for `(_below(score), score)`."""
+    return math.nextafter(score, -math.inf)
+
+
+def _has_non_pawn_material(board: cb.Board) -> bool:
+    """
+    Whether the side to move has pieces other than pawns and the king. Without them,
+    zugzwang is common and null-move pruning is unsound.
+    """
+
+    color_index = cpc.color_index(board.active_color)
+    pawns_and_king = board.get_pieces_bb_by_code(
+        cpc.encode(cpc.PAWN, color_index)
+    ) | board.get_pieces_bb_by_code(cpc.encode(cpc.KING, color_index))
+    return bool(board.get_color_bb_by_index(color_index) & ~pawns_and_king)
+
+
+def _is_quiet(board: cb.Board, move: int) -> bool:
+    """Whether `move` is neither a capture (en passant included) nor a promotion."""
+
+    target = cmc.target(move)
+    en_passant_target = board.en_passant_target
+    return (
+        board.get_piece_code(target) == cpc.EMPTY
+        and cmc.promotion(move) is None
+        and (en_passant_target is None or target != en_passant_target.value)
+    )
+
+
 class Evaluator:
     _stop_search: bool = False
     _info_reporter: EvaluationInfoReporter
-
-    def __init__(self, info_reporter: EvaluationInfoReporter | None = None) -> None:
+    _transposition_table: ct.TranspositionTable
+    _reference_mode: bool
+    _nodes: int
+    _time_manager: ctm.TimeManager
+    # The node count at which `_check_limits` is due, see `ctm.TimeManager`.
+    _next_limits_check: int
+    # Move ordering heuristics, see `_record_cutoff`. Killers are indexed by ply,
+    # history scores by color index and squares (see `_history_index`) and
+    # counter-moves (`cmc.NULL` if unknown) by the squares of the previous move.
+    _killers: list[list[int]]
+    _history: list[int]
+    _counter_moves: list[int]
+    # The legal moves of the root, best first (see `_search_root`), and the nodes
+    # each one took in the last iteration that searched it.
+    _root_moves: list[int]
+    _root_move_nodes: dict[int, int]
+    # Triangular PV table: the row of each ply holds, from index `ply` up to
+    # `_pv_lengths[ply]` (exclusive), the PV of the node last searched at that ply.
+    # Each node builds its PV from the one of the next ply, without allocating.
+    _pv_table: list[list[int]]
+    _pv_lengths: list[int]
+
+    def __init__(
+        self,
+        info_reporter: EvaluationInfoReporter | None = None,
+        *,
+        hash_size_mb: int = ct.DEFAULT_SIZE_MB,
+        reference_mode: bool = False,
+    ) -> None:
         """
         If instantiated without an `info_reporter`, all infos are suppressed.
+
+        `hash_size_mb` is the approximate size of the transposition table.
+
+        `reference_mode` is meant for verifying the search: after every iteration,
+        the same depth is searched again with plain minimax, and the root scores are
+        asserted to be the same. Anything that could make them legitimately differ
+        (such as cutoffs on deeper transposition table entries) is disabled. This
+        makes searches much slower.
         """
 
         if info_reporter is None:
             self._info_reporter = _NilInfoReporter()
         else:
             self._info_reporter = info_reporter
+        self._transposition_table = ct.TranspositionTable(hash_size_mb)
+        self._reference_mode = reference_mode
+        self._nodes = 0
+        self._time_manager = ctm.TimeManager()
+        self._killers = []
+        self._root_moves = []
+        self._root_move_nodes = {}
+        self._pv_table = []
+        self._pv_lengths = []
+        self.clear_heuristics()
         self._reset_search_params()
 
+    def set_hash_size(self, size_mb: int) -> None:
+        """
+        Resize the transposition table, discarding everything stored in it.
+
+        ValueError is raised if the size is not allowed by the table.
+        """
+
+        self._transposition_table.resize(size_mb)
+
+    def clear_hash(self) -> None:
+        self._transposition_table.clear()
+
+    def clear_heuristics(self) -> None:
+        """Forget the move ordering statistics gathered by previous searches."""
+
+        self._history = [0] * (2 << _HISTORY_COLOR_SHIFT)
+        self._counter_moves = [cmc.NULL] * (_FROM_TO_MASK + 1)
+
+    @property
+    def nodes(self) -> int:
+        """Number of nodes visited by the most recent search."""
+        return self._nodes
+
     def start_search(
         self,
         board: cb.Board,
         *,
         max_depth: int,
+        limits: ctm.SearchLimits | None = None,
     ) -> c.Move | None:
+        """
+        Search `board` with iterative deepening, up to `max_depth` or until `limits`
+        (by default, none) are reached. Limits are ignored in reference mode.
+        """
+
         self._reset_search_params()
 
         if max_depth < 1:
             raise ValueError("The minimum allowed depth is 1")
 
-        subdepth_bestmove: c.Move | None = None
+        if limits is None or self._reference_mode:
+            limits = ctm.SearchLimits()
+        self._time_manager.start(limits, board.active_color)
+        self._next_limits_check = self._time_manager.next_check(0)
+        self._transposition_table.new_search()
+        # Killers found at some ply are only relevant to the same ply of the same
+        # search, unlike history scores and counter-moves, which are just aged.
+        self._killers = [[] for _ in range(max_depth + 1)]
+        entry = self._transposition_table.probe(board.zobrist_key)
+        self._root_moves = list(
+            cmp.staged_moves(board, None if entry is None else entry.best_move)
+        )
+        self._root_move_nodes = {}
+        # No node is deeper than `max_depth` plies (see `_negamax`).
+        self._pv_table = [[cmc.NULL] * (max_depth + 1) for _ in range(max_depth + 1)]
+        self._pv_lengths = [0] * (max_depth + 1)
+
+        subdepth_bestmove: int | None = None
+        # The evaluation of every completed iteration, by depth - 1.
+        evaluations: list[float] = []
+        iteration_seconds = 0.0
         for subdepth in range(1, max_depth + 1):
             if self._stop_search:
                 break
+            if subdepth > 1 and not self._time_manager.can_start_iteration(
+                iteration_seconds
+            ):
+                logger.info("Not enough time left for depth %d", subdepth)
+                break
 
-            if (result := self._perform_search(board, subdepth)) is not None:
-                pv, evaluation = result
-                assert len(pv) >= 1
-                subdepth_bestmove = pv[0]
-                self._info_reporter.report_info(
-                    depth=subdepth, best_evaluation=evaluation, pv=pv
-                )
+            self._age_history()
+            iteration_start = self._time_manager.elapsed()
+            pv, evaluation, completed = self._perform_search(
+                board,
+                subdepth,
+                # Scores of odd and even depths tend to differ (the side to move at
+                # the leaves changes), so the aspiration window is centered on the
+                # last score of the same parity.
+                evaluations[-2] if len(evaluations) >= 2 else None,  # noqa: PLR2004
+            )
+            iteration_seconds = self._time_manager.elapsed() - iteration_start
+            if not completed:
+                if subdepth_bestmove is None:
+                    # Not even the first iteration completed, but a move is still
+                    # better than nothing.
+                    subdepth_bestmove = (
+                        pv[0] if pv else next(iter(self._root_moves), None)
+                    )
+                break
+
+            assert len(pv) >= 1
+            if self._reference_mode:
+                self._check_against_reference(board, subdepth, evaluation)
+            subdepth_bestmove = pv[0]
+            evaluations.append(evaluation)
+            self._info_reporter.report_info(
+                depth=subdepth,
+                best_evaluation=evaluation,
+                pv=[
+                    cmc.to_move(move)
+                    for move in self._extend_pv_from_tt(board, pv, subdepth)
+                ],
+            )
 
-        return subdepth_bestmove
+        return None if subdepth_bestmove is None else cmc.to_move(subdepth_bestmove)
 
     def _perform_search(
-        self, board: cb.Board, depth: int
-    ) -> tuple[list[c.Move], float] | None:
-        maximizing = board.active_color == c.Color.WHITE
-        best_value = float("-inf") if maximizing else float("inf")
-        pv: list[c.Move] = []
+        self, board: cb.Board, depth: int, expected_evaluation: float | None
+    ) -> tuple[list[int], float, bool]:
+        """
+        Search the root, returning the PV (encoded as in `cmc`), its evaluation from
+        white's perspective and whether the search completed.
 
-        for move in cm.generate_all_legal_moves(board):
-            if self._stop_search:
-                return None
+        `expected_evaluation` is the evaluation it will likely have (None if unknown),
+        around which an aspiration window is tried first.
+
+        If the search was stopped, the PV only accounts for the root moves that were
+        searched completely (so it may be empty), and the evaluation is meaningless.
+        """
 
-            board.make_move(move)
-            new_pv: list[c.Move] = []
-            move_value = self._minimax(board, depth - 1, not maximizing, new_pv)
+        alpha, beta = -math.inf, math.inf
+        delta = _ASPIRATION_DELTA
+        if depth >= _ASPIRATION_MIN_DEPTH and expected_evaluation is not None:
+            expected_value = self._flip_for_side(board, expected_evaluation)
+            alpha, beta = expected_value - delta, expected_value + delta
+
+        while True:
+            pv, best_value, completed = self._search_root(board, depth, alpha, beta)
+            failed_low = best_value <= alpha != -math.inf
+            failed_high = best_value >= beta != math.inf
+            if not completed or not (failed_low or failed_high):
+                return pv, self._flip_for_side(board, best_value), completed
+
+            delta *= _ASPIRATION_GROWTH
+            logger.debug("Aspiration window failed at depth %d", depth)
+            if failed_low:
+                alpha = (
+                    best_value - delta if delta <= _ASPIRATION_MAX_DELTA else -math.inf
+                )
+            else:
+                beta = (
+                    best_value + delta if delta <= _ASPIRATION_MAX_DELTA else math.inf
+                )
+
+    def _search_root(
+        self, board: cb.Board, depth: int, alpha: float, beta: float
+    ) -> tuple[list[int], float, bool]:
+        """
+        Fail-soft search of the root within the window `(alpha, beta)`, returning
+        the PV, its value from the perspective of the side to move and whether the
+        search completed (see `_perform_search`).
+
+        Root moves are searched in the order of `_root_moves` (with principal
+        variation search, see `_search_move`), which is then updated for the next
+        search: the best move first, and the others by the number of
+        nodes their subtrees took, since that is how hard they were to refute.
+        """
+
+        self._nodes += 1
+        self._pv_lengths[0] = 0
+        original_alpha = alpha
+        best_value = -math.inf
+
+        for i, move in enumerate(self._root_moves):
+            nodes = self._nodes
+            board.make_legal_move(move)
+            move_value = self._search_move(board, depth, 0, i, 0, alpha, beta)
             board.unmake_move()
 
-            if (maximizing and move_value > best_value) or (
-                not maximizing and move_value < best_value
-            ):
-                best_value = move_value
-                pv = [move, *new_pv]
+            if self._stop_search:
+                return self._pv_table[0][: self._pv_lengths[0]], best_value, False
 
-        return pv, best_value
+            self._root_move_nodes[move] = self._nodes - nodes
+            if move_value > best_value:
+                best_value = move_value
+                self._update_pv(0, move)
+                alpha = max(alpha, move_value)
+                if alpha >= beta:
+                    break
+
+        pv = self._pv_table[0][: self._pv_lengths[0]]
+        if pv and best_value > original_alpha:
+            best_move = pv[0]
+            self._root_moves.sort(
+                key=lambda move: (
+                    move != best_move,
+                    -self._root_move_nodes.get(move, 0),
+                )
+            )
+            self._transposition_table.store(
+                board.zobrist_key,
+                depth,
+                best_value,
+                self._bound_for(best_value, original_alpha, beta),
+                best_move,
+            )
+        return pv, best_value, True
 
     def stop_search(self) -> None:
         self._stop_search = True
 
     def _reset_search_params(self) -> None:
         self._stop_search = False
+        self._nodes = 0
+        self._next_limits_check = self._time_manager.next_check(0)
+
+    def _update_pv(self, ply: int, move: int) -> None:
+        """
+        Make the PV of ply `ply` be `move`, followed by the PV just found at the next
+        ply (after searching `move`).
+        """
+
+        row = self._pv_table[ply]
+        child_row = self._pv_table[ply + 1]
+        child_length = self._pv_lengths[ply + 1]
+        row[ply] = move
+        # Copied in place: slicing would build a temporary list at every new best move.
+        for i in range(ply + 1, child_length):
+            row[i] = child_row[i]
+        self._pv_lengths[ply] = child_length
+
+    def _extend_pv_from_tt(
+        self, board: cb.Board, pv: list[int], depth: int
+    ) -> list[int]:
+        """
+        Extend `pv` up to `depth` moves with the best moves stored in the
+        transposition table, since it is truncated wherever a node was cut off by
+        the table. Extension stops at the first missing or illegal (e.g. after a key
+        collision) move, and once a position repeats.
+        """
+
+        extended = pv.copy()
+        seen_keys = {board.zobrist_key}
+        for move in pv:
+            board.make_legal_move(move)
+            seen_keys.add(board.zobrist_key)
 
-    def _minimax(
-        self, board: cb.Board, depth: int, maximizing: bool, current_pv: list[c.Move]
+        while len(extended) < depth:
+            entry = self._transposition_table.probe(board.zobrist_key)
+            if entry is None or entry.best_move is None:
+                break
+            move = entry.best_move
+            if move not in cm.generate_legal_move_codes(
+                board, bb.SQUARES[cmc.source(move)]
+            ):
+                break
+
+            board.make_legal_move(move)
+            extended.append(move)
+            if board.zobrist_key in seen_keys:
+                break
+            seen_keys.add(board.zobrist_key)
+
+        for _ in extended:
+            board.unmake_move()
+        return extended
+
+    def _check_limits(self) -> None:
+        if self._time_manager.is_past_hard_limit(self._nodes):
+            self._stop_search = True
+        self._next_limits_check = self._time_manager.next_check(self._nodes)
+
+    def _negamax(  # noqa: PLR0913
+        self,
+        board: cb.Board,
+        depth: int,
+        ply: int,
+        alpha: float,
+        beta: float,
+        *,
+        allow_null_move: bool = True,
     ) -> float:
-        assert depth >= 0
+        """
+        Fail-soft alpha-beta search with principal variation search, null-move
+        pruning and late move reductions (both disabled in reference mode). The
+        result is from the perspective of the side to move.
+
+        `allow_null_move` is unset right after a null move, so that two are never made
+        in a row (which would just search the same position with less depth).
 
-        local_best_pv: list[c.Move] = []
-        previous_evaluation = float("-inf") if maximizing else float("inf")
+        `ply` is the distance from the root. The PV found is left in `_pv_table`.
+
+        If the search is stopped, the result is meaningless and must be discarded.
+        """
+
+        assert depth >= 0
+        self._nodes += 1
+        self._pv_lengths[ply] = ply
+        if self._nodes >= self._next_limits_check:
+            self._check_limits()
 
         if self._stop_search:
-            return previous_evaluation
+            return -math.inf
+
+        key = board.zobrist_key
+        entry = self._transposition_table.probe(key)
+        if entry is not None and self._is_tt_cutoff(entry, depth, alpha, beta):
+            if entry.best_move is not None:
+                self._pv_table[ply][ply] = entry.best_move
+                self._pv_lengths[ply] = ply + 1
+            return entry.score
 
         if depth == 0:
-            # TODO: quiescence search instead of evaluating right away.
-            return self._evaluate_score(board)
+            return self._search_horizon(board, alpha, beta)
+
+        in_check = board.is_in_check()
+        if allow_null_move and not in_check:
+            null_move_value = self._null_move_search(board, depth, ply, beta)
+            if null_move_value >= beta or self._stop_search:
+                return null_move_value
+
+        original_alpha = alpha
+        best_value = -math.inf
+        best_move = None
+        reduce_late_moves = (
+            not self._reference_mode and depth >= _LMR_MIN_DEPTH and not in_check
+        )
+
+        searched_moves: list[int] = []
+
+        hash_move = None if entry is None else entry.best_move
+        for i, move in enumerate(self._ordered_moves(board, ply, hash_move)):
+            is_late_quiet = (
+                reduce_late_moves
+                and i >= _LMR_MIN_MOVE_INDEX
+                and _is_quiet(board, move)
+            )
+            board.make_legal_move(move)
+            # Checks are forcing, and often better than they look.
+            reduction = (
+                _lmr_reductions[min(depth, _LMR_TABLE_SIZE - 1)][
+                    min(i, _LMR_TABLE_SIZE - 1)
+                ]
+                if is_late_quiet and not board.is_in_check()
+                else 0
+            )
+
+            value = self._search_move(board, depth, ply, i, reduction, alpha, beta)
+            board.unmake_move()
 
-        for move in cm.generate_all_legal_moves(board):
             if self._stop_search:
-                return previous_evaluation
+                return best_value
+
+            if value > best_value:
+                best_value = value
+                best_move = move
+                self._update_pv(ply, move)
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self._record_cutoff(board, depth, ply, move, searched_moves)
+                        break
+            searched_moves.append(move)
+
+        self._transposition_table.store(
+            key,
+            depth,
+            best_value,
+            self._bound_for(best_value, original_alpha, beta),
+            best_move,
+        )
+        return best_value
+
+    def _ordered_moves(
+        self, board: cb.Board, ply: int, hash_move: int | None
+    ) -> Iterator[int]:
+        """See `cmp.staged_moves`, fed with the move ordering heuristics."""
+
+        history = self._history
+        color_offset = cpc.color_index(board.active_color) << _HISTORY_COLOR_SHIFT
+
+        def history_score(move: int) -> int:
+            return history[color_offset | move & _FROM_TO_MASK]
+
+        last_move = board.get_last_move_code()
+        counter_move = (
+            self._counter_moves[last_move & _FROM_TO_MASK] if last_move else cmc.NULL
+        )
+        return cmp.staged_moves(
+            board,
+            hash_move,
+            self._killers[ply],
+            history_score,
+            counter_move or None,
+        )
+
+    def _record_cutoff(  # noqa: PLR0913
+        self,
+        board: cb.Board,
+        depth: int,
+        ply: int,
+        move: int,
+        searched_moves: list[int],
+    ) -> None:
+        """
+        Update the move ordering heuristics after `move` caused a beta cutoff at a
+        node of depth `depth` and ply `ply`, once `searched_moves` failed to.
+
+        Only quiet moves are recorded: captures are ordered well enough by SEE and
+        MVV-LVA. The move becomes the first killer of the ply and the counter-move of
+        the previous move, and its history score grows with the depth, at the expense
+        of the quiet moves searched before it.
+        """
 
-            board.make_move(move)
-            new_pv: list[c.Move] = []
-            evaluation = self._minimax(board, depth - 1, not maximizing, new_pv)
+        if not _is_quiet(board, move):
+            return
+
+        killers = self._killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[_KILLERS_PER_PLY:]
+
+        last_move = board.get_last_move_code()
+        if last_move:
+            self._counter_moves[last_move & _FROM_TO_MASK] = move
+
+        bonus = depth * depth
+        color_offset = cpc.color_index(board.active_color) << _HISTORY_COLOR_SHIFT
+        self._history[color_offset | move & _FROM_TO_MASK] += bonus
+        for searched in searched_moves:
+            if _is_quiet(board, searched):
+                self._history[color_offset | searched & _FROM_TO_MASK] -= bonus
+
+    def _age_history(self) -> None:
+        """Halve the history scores, so that recent cutoffs weigh more."""
+        self._history = [int(score / 2) for score in self._history]
+
+    def _search_move(  # noqa: PLR0913
+        self,
+        board: cb.Board,
+        depth: int,
+        ply: int,
+        move_index: int,
+        reduction: int,
+        alpha: float,
+        beta: float,
+    ) -> float:
+        """
+        Search the move of index `move_index` of a node of depth `depth` and ply
+        `ply`, which was just made on `board`. The result is from the perspective of
+        the node.
+
+        Only the first move is searched with the full window. For the others, assume
+        the first move is the best one, and only prove that they are not better than
+        it, at a depth reduced by `reduction` (for late moves). Search them fully only
+        if that fails.
+        """
+
+        child_ply = ply + 1
+        if move_index == 0:
+            return -self._negamax(board, depth - 1, child_ply, -beta, -alpha)
+
+        value = -self._negamax(
+            board, max(depth - 1 - reduction, 0), child_ply, -_above(alpha), -alpha
+        )
+        if reduction and value > alpha:
+            value = -self._negamax(board, depth - 1, child_ply, -_above(alpha), -alpha)
+        if alpha < value < beta:
+            value = -self._negamax(board, depth - 1, child_ply, -beta, -alpha)
+        return value
+
+    def _null_move_search(
+        self, board: cb.Board, depth: int, ply: int, beta: float
+    ) -> float:
+        """
+        Let the side to move (which must not be in check) pass, and search the
+        opponent's reply with a reduced depth and a null window around `beta`. A
+        result of at least `beta` means the node can be cut off with it.
+
+        The result is -inf whenever null-move pruning does not apply.
+        """
+
+        if (
+            self._reference_mode
+            or depth < _NULL_MOVE_MIN_DEPTH
+            or math.isinf(beta)
+            or not _has_non_pawn_material(board)
+        ):
+            return -math.inf
+
+        board.make_null_move()
+        value = -self._negamax(
+            board,
+            depth - 1 - _NULL_MOVE_REDUCTION,
+            ply + 1,
+            -beta,
+            -_below(beta),
+            allow_null_move=False,
+        )
+        board.unmake_null_move()
+        # Not trusting mate scores, which may only be there because of the pass.
+        return beta if value == math.inf else value
+
+    def _search_horizon(self, board: cb.Board, alpha: float, beta: float) -> float:
+        """
+        Search a node of depth 0 (see `_quiesce`), storing the result in the
+        transposition table unless the search was stopped meanwhile.
+        """
+
+        evaluation = self._quiesce(board, alpha, beta)
+        if not self._stop_search:
+            self._transposition_table.store(
+                board.zobrist_key,
+                0,
+                evaluation,
+                self._bound_for(evaluation, alpha, beta),
+                None,
+            )
+        return evaluation
+
+    def _quiesce(
+        self, board: cb.Board, alpha: float, beta: float, ply: int = 0
+    ) -> float:
+        """
+        Keep searching captures and promotions until the position is quiet, so that
+        positions are not evaluated in the middle of an exchange (horizon effect).
+        The result is from the perspective of the side to move.
+
+        When in check every evasion is searched instead, since the side to move
+        cannot stand pat. `ply` is the distance from the horizon.
+        """
+
+        self._nodes += 1
+        if self._nodes >= self._next_limits_check:
+            self._check_limits()
+
+        in_check = ply < _QUIESCENCE_MAX_EVASION_PLY and board.is_in_check()
+        if in_check:
+            # Checkmated, unless an evasion below is found.
+            best_value = -math.inf
+            moves = cm.generate_all_legal_move_codes(board)
+        else:
+            # Stand pat: the side to move is not forced to capture, so the static
+            # evaluation is a lower bound of the score.
+            best_value = self._flip_for_side(board, self._evaluate_score(board))
+            if best_value >= beta or self._stop_search:
+                return best_value
+            alpha = max(alpha, best_value)
+            moves = cm.generate_legal_capture_codes(board)
+
+        for move in cmp.most_valuable_victims_first(board, moves):
+            if not in_check:
+                if not self._reference_mode and (
+                    best_value + cs.material_gain(board, move) + _DELTA_PRUNING_MARGIN
+                    < alpha
+                ):
+                    # Delta pruning: even winning the material for free would not be
+                    # enough to raise alpha.
+                    continue
+
+                if cs.static_exchange_evaluation(board, move) < 0:
+                    # Losing captures are very unlikely to be good.
+                    continue
+
+            board.make_legal_move(move)
+            value = -self._quiesce(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        return best_value
+
+    def _is_tt_cutoff(
+        self, entry: ct.TranspositionEntry, depth: int, alpha: float, beta: float
+    ) -> bool:
+        if self._reference_mode:
+            # Deeper entries may give different (better) scores than searching at
+            # exactly `depth`, which is what the reference search does.
+            if entry.depth != depth:
+                return False
+        elif entry.depth < depth:
+            return False
+
+        match entry.bound:
+            case ct.Bound.EXACT:
+                return True
+            case ct.Bound.LOWER:
+                return entry.score >= beta
+            case ct.Bound.UPPER:
+                return entry.score <= alpha
+
+    @staticmethod
+    def _flip_for_side(board: cb.Board, evaluation: float) -> float:
+        """
+        Convert `evaluation` from white's perspective to the side to move's
+        perspective. The conversion is its own inverse, so it also works the other
+        way around.
+        """
+
+        return evaluation if board.active_color == c.Color.WHITE else -evaluation
+
+    @staticmethod
+    def _bound_for(best_value: float, alpha: float, beta: float) -> ct.Bound:
+        if best_value <= alpha:
+            return ct.Bound.UPPER
+        elif best_value >= beta:
+            return ct.Bound.LOWER
+        else:
+            return ct.Bound.EXACT
+
+    def _check_against_reference(
+        self, board: cb.Board, depth: int, evaluation: float
+    ) -> None:
+        nodes = self._nodes
+        self._nodes = 0
+        reference = self._reference_minimax(
+            board, depth, board.active_color == c.Color.WHITE
+        )
+        logger.info(
+            "Reference check at depth %d: %s (%d nodes) vs minimax %s (%d nodes)",
+            depth,
+            evaluation,
+            nodes,
+            reference,
+            self._nodes,
+        )
+        assert evaluation == reference, (
+            f"Search score {evaluation} differs from minimax score {reference} "
+            f"at depth {depth}"
+        )
+        self._nodes = nodes
+
+    def _reference_minimax(
+        self, board: cb.Board, depth: int, maximizing: bool
+    ) -> float:
+        """
+        Plain minimax without any pruning, from white's perspective. Only used to
+        verify the real search in reference mode.
+        """
+
+        self._nodes += 1
+        if depth == 0:
+            return self._flip_for_side(board, self._quiesce(board, -math.inf, math.inf))
+
+        previous_evaluation = -math.inf if maximizing else math.inf
+        for move in cm.generate_all_legal_move_codes(board):
+            board.make_legal_move(move)
+            evaluation = self._reference_minimax(board, depth - 1, not maximizing)
             board.unmake_move()
 
             if (maximizing and evaluation > previous_evaluation) or (
                 not maximizing and evaluation < previous_evaluation
             ):
                 previous_evaluation = evaluation
-                local_best_pv = [move, *new_pv]
 
-        current_pv[:] = local_best_pv
         return previous_evaluation
 
     @staticmethod
     def _calculate_mobility(board: cb.Board) -> tuple[int, int]:
-        current_side_legal_moves = cm.generate_all_legal_moves(board)
+        current_side_legal_moves = cm.generate_all_legal_move_codes(board)
         # We must reset en passant target, otherwise the board can count the en passant
         # as a possible move for the other side.
         prev_en_passant_tg = board.en_passant_target
         board.active_color = board.active_color.invert()
         board.en_passant_target = None
 
-        other_side_legal_moves = cm.generate_all_legal_moves(board)
+        other_side_legal_moves = cm.generate_all_legal_move_codes(board)
         board.en_passant_target = prev_en_passant_tg
         board.active_color = board.active_color.invert()
 
@@ -151,17 +868,11 @@ class Evaluator:
 
     @staticmethod
     def _calculate_piece_counts(board: cb.Board) -> dict[c.Color, dict[Any, int]]:
-        piece_counts = {
-            color: {key: 0 for key in c.Type}
+        return {
+            color: {ptype: board.get_piece_count(ptype, color) for ptype in c.Type}
             for color in [c.Color.WHITE, c.Color.BLACK]
         }
 
-        for square in c.Square:
-            if (piece := board.get_piece_by_square(square)) is not None:
-                piece_counts[piece.color][piece.ptype] += 1
-
-        return piece_counts
-
     @classmethod
     def _evaluate_score(cls, board: cb.Board) -> float:
         # TODO: Enhance evaluation for openings and endgames.
@@ -182,22 +893,13 @@ class Evaluator:
             # Stalemate
             return 0
 
-        weight = {
-            c.Type.KING: 200,
-            c.Type.QUEEN: 9,
-            c.Type.ROOK: 5,
-            c.Type.BISHOP: 3,
-            c.Type.KNIGHT: 3,
-            c.Type.PAWN: 1.0,
-        }
-
         score = sum(
-            weight[piece_type]
+            cpc.VALUES[piece_type.value]
             * (
                 piece_counts[c.Color.WHITE][piece_type]
                 - piece_counts[c.Color.BLACK][piece_type]
             )
-            for piece_type in weight
+            for piece_type in c.Type
         )
 
         mobility_weight = 0.1
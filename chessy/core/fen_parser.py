@@ -1,3 +1,10 @@
+from __future__ import annotations
+
+import re
+import struct
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 
 import chessy.core as c
@@ -181,7 +188,46 @@ def _parse_fullmove_number(v: str) -> int:
         ) from None
 
 
-def parse(value: str) -> FenParseResult:
+# What each character of a piece placement expands to, for `_parse_trusted`.
+_trusted_placement_chars: dict[str, list[c.Piece | None]] = {
+    **{letter: [c.Piece.from_letter(letter)] for letter in "pnbrqkPNBRQK"},
+    **{str(n): [None] * n for n in range(1, 9)},
+}
+_trusted_active_colors = {"w": c.Color.WHITE, "b": c.Color.BLACK}
+
+
+def _parse_trusted(value: str) -> FenParseResult:
+    (
+        s_piece_placement,
+        s_active_color,
+        s_castling_availability,
+        s_en_passant_target,
+        s_halfmove_clock,
+        s_fullmove_number,
+    ) = value.split()
+
+    piece_placement: list[c.Piece | None] = []
+    # FEN ranks go from the 8th to the 1st.
+    for rank in reversed(s_piece_placement.split("/")):
+        for char in rank:
+            piece_placement += _trusted_placement_chars[char]
+
+    return FenParseResult(
+        piece_placement,
+        _trusted_active_colors[s_active_color],
+        c.CastlingAvailability(
+            "K" in s_castling_availability,
+            "Q" in s_castling_availability,
+            "k" in s_castling_availability,
+            "q" in s_castling_availability,
+        ),
+        None if s_en_passant_target == "-" else c.Square[s_en_passant_target],
+        int(s_halfmove_clock),
+        int(s_fullmove_number),
+    )
+
+
+def parse(value: str, *, trusted: bool = False) -> FenParseResult:
     """
     Parse `value` as a FEN, extracting all of its information.
     Semantics of the position is not taken into consideration - meaning e.g. a position
@@ -190,9 +236,16 @@ def parse(value: str) -> FenParseResult:
 
     Can raise multiple exceptions, all of which inherit `FenValidationError`.
 
+    If `trusted` is set to True, `value` is assumed to be well-formed (e.g. because it
+    was produced by `Board.to_fen`) and most of the validation is skipped, which makes
+    parsing several times faster. The result is unspecified for malformed FENs.
+
     For examples and explanations, see https://en.wikipedia.org/wiki/Forsyth-Edwards_Notation.
     """
 
+    if trusted:
+        return _parse_trusted(value)
+
     groups = value.split()
     expected_ngroups = 6
     _fen_validation_assert(
@@ -226,3 +279,146 @@ def parse(value: str) -> FenParseResult:
         halfmove_clock,
         fullmove_number,
     )
+
+
+# EPD operations are separated by semicolons, and their operands by whitespace unless
+# quoted.
+_epd_token_pattern = re.compile(r'"([^"]*)"|(;)|([^\s;"]+)')
+_epd_position_groups = 4
+
+
+def _parse_epd_operations(v: str) -> dict[str, list[str]]:
+    operations: dict[str, list[str]] = {}
+    operands: list[str] | None = None
+    for quoted, separator, bare in _epd_token_pattern.findall(v):
+        if separator:
+            operands = None
+        elif operands is None:
+            operands = operations[bare or quoted] = []
+        else:
+            operands.append(quoted or bare)
+    return operations
+
+
+def parse_epd(value: str) -> tuple[FenParseResult, dict[str, list[str]]]:
+    """
+    Parse `value` as an EPD, which is a FEN without the clocks followed by
+    operations (e.g. `bm Nf3; id "test 1";`). The operations are returned by opcode,
+    with their operands unparsed.
+
+    The clocks are taken from the `hmvc` and `fmvn` operations, defaulting to 0 and
+    1. Lines with a full FEN before the operations are also accepted.
+
+    Can raise the same exceptions as `parse`.
+    """
+
+    groups = value.split(maxsplit=_epd_position_groups)
+    _fen_validation_assert(
+        (actual_ngroups := len(groups)) >= _epd_position_groups,
+        FenInvalidNumberOfGroupsError(
+            f"Expected at least {_epd_position_groups} groups, got {actual_ngroups}."
+        ),
+    )
+
+    s_position = groups[:_epd_position_groups]
+    s_operations = groups[_epd_position_groups] if len(groups) > len(s_position) else ""
+    # Some EPDs carry full FENs, in which case the clocks come before the operations.
+    match s_operations.split(maxsplit=2):
+        case [s_halfmove_clock, s_fullmove_number, *rest] if (
+            s_halfmove_clock.isdigit() and s_fullmove_number.isdigit()
+        ):
+            operations = _parse_epd_operations(rest[0] if rest else "")
+            clocks = [s_halfmove_clock, s_fullmove_number]
+        case _:
+            operations = _parse_epd_operations(s_operations)
+            clocks = [
+                (operations.get("hmvc") or ["0"])[0],
+                (operations.get("fmvn") or ["1"])[0],
+            ]
+
+    return parse(" ".join(s_position + clocks)), operations
+
+
+@dataclass(frozen=True, slots=True)
+class EpdRecord:
+    # 1-based, as in text editors.
+    line_number: int
+    # See `cb.Board.to_bytes`, which keeps records cheap to store and to send across
+    # processes.
+    snapshot: bytes
+    operations: dict[str, list[str]]
+
+    def to_board(self) -> cb.Board:
+        return cb.Board.from_bytes(self.snapshot)
+
+
+@dataclass(frozen=True, slots=True)
+class EpdError:
+    line_number: int
+    line: str
+    message: str
+
+
+def _load_epd_line(line_number: int, line: str) -> EpdRecord | EpdError:
+    try:
+        position, operations = parse_epd(line)
+        board = cb.Board(
+            position.piece_placement,
+            position.active_color,
+            position.castling_availability,
+            position.en_passant_target,
+            position.halfmove_clock,
+            position.fullmove_number,
+        )
+        return EpdRecord(line_number, board.to_bytes(), operations)
+    except (FenValidationError, cb.UnreachablePositionError, struct.error) as e:
+        return EpdError(line_number, line, str(e))
+
+
+def _load_epd_chunk(lines: list[tuple[int, str]]) -> list[EpdRecord | EpdError]:
+    return [_load_epd_line(line_number, line) for line_number, line in lines]
+
+
+def _epd_chunks(
+    lines: Iterable[str], chunk_size: int
+) -> Iterator[list[tuple[int, str]]]:
+    chunk: list[tuple[int, str]] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not (line := line.strip()):
+            continue
+        chunk.append((line_number, line))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_epd(
+    lines: Iterable[str], max_workers: int = 1, chunk_size: int = 1024
+) -> Iterator[EpdRecord | EpdError]:
+    """
+    Lazily parse every non-empty line of `lines` (e.g. an open EPD file) with
+    `parse_epd`, in order. Lines that cannot be parsed, or whose position is not
+    accepted by `cb.Board`, yield an `EpdError` instead of raising.
+
+    If `max_workers` is greater than 1, the lines are parsed by that many processes,
+    `chunk_size` lines at a time. Only a few chunks per worker are read ahead, so
+    memory use does not depend on the size of the input.
+    """
+
+    chunks = _epd_chunks(lines, chunk_size)
+    if max_workers <= 1:
+        for chunk in chunks:
+            yield from _load_epd_chunk(chunk)
+        return
+
+    max_pending = 2 * max_workers
+    with ProcessPoolExecutor(max_workers) as executor:
+        pending: deque[Future[list[EpdRecord | EpdError]]] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_load_epd_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,86 @@
+"""
+Compact integer encoding of moves, used on the engine's hot paths instead of `c.Move`.
+
+A move code is a 16-bit integer: bits 0-5 hold the source square, bits 6-11 the
+target square and bits 12-14 the promotion (see `_PROMOTION_TYPES`), with 0 meaning no
+promotion. Whether a move is a capture, castling or en passant depends on the position
+and is not encoded, so that a move has exactly one code no matter where it came from
+(move generation, the transposition table, UCI...).
+
+`c.Move` is kept for the APIs meant to be used from outside of the engine. Converting
+between the two is cheap, and decoding returns preallocated `c.Move` objects.
+"""
+
+from __future__ import annotations
+
+import chessy.core as c
+
+SOURCE_MASK = 0x3F
+TARGET_SHIFT = 6
+TARGET_MASK = 0x3F << TARGET_SHIFT
+PROMOTION_SHIFT = 12
+
+# The source and target squares are never the same, so 0 is not a valid move.
+NULL = 0
+
+_PROMOTION_TYPES = (None, c.Type.KNIGHT, c.Type.BISHOP, c.Type.ROOK, c.Type.QUEEN)
+_PROMOTION_CODES = {ptype: i for i, ptype in enumerate(_PROMOTION_TYPES)}
+_PROMOTION_PTYPE_VALUES = tuple(
+    0 if ptype is None else ptype.value for ptype in _PROMOTION_TYPES
+)
+
+
+def encode(
+    source_index: int, target_index: int, promotion: c.Type | None = None
+) -> int:
+    return (
+        source_index
+        | target_index << TARGET_SHIFT
+        | _PROMOTION_CODES[promotion] << PROMOTION_SHIFT
+    )
+
+
+def _build_moves_table() -> list[c.Move | None]:
+    table: list[c.Move | None] = [None] * (len(_PROMOTION_TYPES) << PROMOTION_SHIFT)
+    for source in c.Square:
+        for target in c.Square:
+            if source == target:
+                continue
+
+            table[encode(source.value, target.value)] = c.Move(source, target)
+            if target.rank() in {c.Square.first_rank(), c.Square.last_rank()}:
+                for promotion in _PROMOTION_TYPES[1:]:
+                    table[encode(source.value, target.value, promotion)] = c.Move(
+                        source, target, promotion
+                    )
+    return table
+
+
+_moves_table = _build_moves_table()
+
+
+def from_move(move: c.Move) -> int:
+    return encode(move.source.value, move.target.value, move.promotion)
+
+
+def to_move(code: int) -> c.Move:
+    move = _moves_table[code]
+    assert move is not None, f"Invalid move code {code:#x}"
+    return move
+
+
+def source(code: int) -> int:
+    return code & SOURCE_MASK
+
+
+def target(code: int) -> int:
+    return (code & TARGET_MASK) >> TARGET_SHIFT
+
+
+def promotion(code: int) -> c.Type | None:
+    return _PROMOTION_TYPES[code >> PROMOTION_SHIFT]
+
+
+def promotion_ptype_value(code: int) -> int:
+    """Same as `promotion`, but with the type value (see `cpc`), or 0 if none."""
+    return _PROMOTION_PTYPE_VALUES[code >> PROMOTION_SHIFT]
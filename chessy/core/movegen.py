@@ -1,225 +1,478 @@
 from __future__ import annotations
 
-from typing import Literal, TypedDict
+from dataclasses import dataclass
 
 import chessy.core as c
 import chessy.core.atkgen as ca
+import chessy.core.bitboard as bb
 import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.piececode as cpc
+
+# Internally, squares are their values, pieces and colors are encoded as in `cpc` and
+# moves as in `cmc`.
+
+_promotion_types = (c.Type.QUEEN, c.Type.ROOK, c.Type.BISHOP, c.Type.KNIGHT)
+_nonpawn_types = (cpc.KNIGHT, cpc.BISHOP, cpc.ROOK, cpc.QUEEN, cpc.KING)
+
+
+@dataclass(frozen=True, slots=True)
+class _CastlingPath:
+    # As in `c.CastlingAvailability.to_mask`.
+    right: int
+    king_source: int
+    king_target: int
+    # Squares that must be empty.
+    empty: int
+    # Squares the king goes through, which must not be attacked.
+    king_path: int
+
+
+def _castling_path(
+    right: int,
+    king_source: c.Square,
+    king_target: c.Square,
+    king_path: list[c.Square],
+    extra_empty: list[c.Square],
+) -> _CastlingPath:
+    return _CastlingPath(
+        right,
+        king_source.value,
+        king_target.value,
+        bb.from_squares(king_path + extra_empty),
+        bb.from_squares(king_path),
+    )
+
+
+# Indexed by color index, kingside first.
+_castling_paths = (
+    (
+        _castling_path(
+            0b0001, c.Square.e1, c.Square.g1, [c.Square.f1, c.Square.g1], []
+        ),
+        _castling_path(
+            0b0010, c.Square.e1, c.Square.c1, [c.Square.d1, c.Square.c1], [c.Square.b1]
+        ),
+    ),
+    (
+        _castling_path(
+            0b0100, c.Square.e8, c.Square.g8, [c.Square.f8, c.Square.g8], []
+        ),
+        _castling_path(
+            0b1000, c.Square.e8, c.Square.c8, [c.Square.d8, c.Square.c8], [c.Square.b8]
+        ),
+    ),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _LegalityInfo:
+    """
+    Everything needed to decide whether a pseudo-legal move of the side to move is
+    legal without making it. See `_compute_legality_info`.
+    """
 
+    # Of the side to move.
+    color_index: int
+    king_index: int
+    # Enemy pieces giving check.
+    checkers: int
+    # Squares attacked by the enemy as if the king were not on the board, so that the
+    # king cannot step back along the line of a slider checking it.
+    king_danger: int
+    # Squares where non-king moves may land: anywhere when not in check, the checker
+    # or the squares between it and the king in single check, nowhere in double check.
+    evasion_targets: int
+    # For every pinned piece, the squares between the king and the pinner, plus the
+    # pinner itself. Pinned pieces can only move within them.
+    pin_rays: dict[int, int]
+
+    def allowed_targets(self, source_index: int) -> int:
+        """
+        Get the squares where a non-king piece at `source_index` may land. En passant
+        is the only exception, see `_en_passant_is_legal`.
+        """
+
+        return self.evasion_targets & self.pin_rays.get(source_index, bb.FULL)
+
+
+def _nonpawn_attacks_bb(ptype: int, square_index: int, occupancy: int) -> int:
+    if ptype == cpc.KNIGHT:
+        return ca.knight_attacks_bb(square_index)
+    if ptype == cpc.BISHOP:
+        return ca.bishop_attacks_bb(square_index, occupancy)
+    if ptype == cpc.ROOK:
+        return ca.rook_attacks_bb(square_index, occupancy)
+    if ptype == cpc.QUEEN:
+        return ca.queen_attacks_bb(square_index, occupancy)
+    assert ptype == cpc.KING
+    return ca.king_attacks_bb(square_index)
+
+
+def _attacked_squares_bb(board: cb.Board, color_index: int, occupancy: int) -> int:
+    """
+    Get every square attacked by `color_index` when the occupied squares are
+    `occupancy`.
+    """
 
-def _board_would_be_in_check_after_move(board: cb.Board, move: c.Move) -> bool:
-    color = board.active_color
-    # Validating move requires move generation, and this method is called during move
-    # generation. So not bypassing validation would generate an infinite recursion.
-    # But this is not a problem since the move generator only generates pseudolegal
-    # moves.
-    board.make_move(move, bypass_validation=True)
-    result = board.is_in_check(color)
-    board.unmake_move()
+    color = cpc.COLORS[color_index]
+    result = bb.EMPTY
+    for i in bb.iter_indexes(
+        board.get_pieces_bb_by_code(cpc.encode(cpc.PAWN, color_index))
+    ):
+        result |= ca.pawn_attacks_bb(i, color)
+    for ptype in _nonpawn_types:
+        for i in bb.iter_indexes(
+            board.get_pieces_bb_by_code(cpc.encode(ptype, color_index))
+        ):
+            result |= _nonpawn_attacks_bb(ptype, i, occupancy)
     return result
 
 
-def _generate_nonpawn_pseudolegal_standard_moves(
-    board: cb.Board, square: c.Square
-) -> set[c.Move]:
-    piece = board.get_piece_by_square(square)
-    assert piece is not None and piece.ptype != c.Type.PAWN
-
-    attacks = ca.generate_attacks(board, square, piece)
-    result: set[c.Move] = set()
-    for attack in attacks:
-        maybe_target_piece = board.get_piece_by_square(attack)
-        # TODO (perf): We only need to check the edge moves. Every non-edge attack is
-        # automatically a move since it is not blocked (hence intermediate
-        # squares can only be empty).
-        if maybe_target_piece is not None and maybe_target_piece.color == piece.color:
-            continue
-        else:
-            result.add(c.Move(square, attack))
-    return result
+def _compute_legality_info(board: cb.Board) -> _LegalityInfo:
+    color_index = cpc.color_index(board.active_color)
+    enemy = color_index ^ 1
+    king_index = board.get_king_square(board.active_color).value
+    occupancy = board.get_occupancy_bb()
 
+    checkers = board.attackers_to_index(king_index, enemy, occupancy)
+    if checkers == bb.EMPTY:
+        evasion_targets = bb.FULL
+    elif checkers & (checkers - 1):
+        # Double check, only the king can move.
+        evasion_targets = bb.EMPTY
+    else:
+        evasion_targets = checkers | ca.between_bb(king_index, bb.lsb(checkers))
+
+    # Enemy sliders that would attack the king if our own pieces were not there.
+    enemies = board.get_color_bb_by_index(enemy)
+    enemy_queens = board.get_pieces_bb_by_code(cpc.encode(cpc.QUEEN, enemy))
+    snipers = (
+        ca.rook_attacks_bb(king_index, enemies)
+        & (board.get_pieces_bb_by_code(cpc.encode(cpc.ROOK, enemy)) | enemy_queens)
+    ) | (
+        ca.bishop_attacks_bb(king_index, enemies)
+        & (board.get_pieces_bb_by_code(cpc.encode(cpc.BISHOP, enemy)) | enemy_queens)
+    )
+    pin_rays: dict[int, int] = {}
+    for sniper in bb.iter_indexes(snipers):
+        ray = ca.between_bb(king_index, sniper)
+        blockers = ray & occupancy
+        # With no blockers the sniper is a checker, with more than one nothing is
+        # pinned.
+        if blockers and not blockers & (blockers - 1):
+            pin_rays[bb.lsb(blockers)] = ray | (1 << sniper)
+
+    return _LegalityInfo(
+        color_index,
+        king_index,
+        checkers,
+        _attacked_squares_bb(board, enemy, occupancy ^ (1 << king_index)),
+        evasion_targets,
+        pin_rays,
+    )
+
+
+def _en_passant_is_legal(
+    board: cb.Board, info: _LegalityInfo, source_index: int, target_index: int
+) -> bool:
+    """
+    En passant removes two pieces from the capturing pawn's path, which pins and
+    check evasion masks do not account for. So the resulting position is checked
+    directly.
+    """
 
-def _generate_castling_moves(board: cb.Board, color: c.Color) -> set[c.Move]:
-    if board.is_in_check():
-        return set()
-
-    result: set[c.Move] = set()
-
-    class CastlingPath(TypedDict):
-        start: c.Square
-        king_path: list[c.Square]
-        full_path: list[c.Square]
-
-    class CastlingPaths(TypedDict):
-        K: CastlingPath
-        Q: CastlingPath
-        k: CastlingPath
-        q: CastlingPath
-
-    castling_paths: CastlingPaths = {
-        "K": {
-            "start": c.Square.e1,
-            "king_path": [c.Square.f1, c.Square.g1],
-            "full_path": [c.Square.f1, c.Square.g1],
-        },
-        "Q": {
-            "start": c.Square.e1,
-            "king_path": [c.Square.d1, c.Square.c1],
-            "full_path": [c.Square.d1, c.Square.c1, c.Square.b1],
-        },
-        "k": {
-            "start": c.Square.e8,
-            "king_path": [c.Square.f8, c.Square.g8],
-            "full_path": [c.Square.f8, c.Square.g8],
-        },
-        "q": {
-            "start": c.Square.e8,
-            "king_path": [c.Square.d8, c.Square.c8],
-            "full_path": [c.Square.d8, c.Square.c8, c.Square.b8],
-        },
-    }
-
-    def path_is_clear(castling_path: Literal["K", "Q", "k", "q"]) -> bool:
-        return all(
-            board.get_piece_by_square(s) is None
-            for s in castling_paths[castling_path]["full_path"]
-        )
+    if info.color_index == cpc.WHITE:
+        captured_index = target_index - 8
+    else:
+        captured_index = target_index + 8
+    occupancy = (
+        board.get_occupancy_bb() ^ (1 << source_index) ^ (1 << captured_index)
+    ) | (1 << target_index)
+    attackers = board.attackers_to_index(
+        info.king_index, info.color_index ^ 1, occupancy
+    )
+    return not attackers & ~(1 << captured_index)
+
+
+def _pawn_move_is_legal(board: cb.Board, info: _LegalityInfo, move: int) -> bool:
+    source, target = cmc.source(move), cmc.target(move)
+    if board.en_passant_target is not None and target == board.en_passant_target.value:
+        return _en_passant_is_legal(board, info, source, target)
+    return bool(info.allowed_targets(source) & (1 << target))
+
+
+def _nonpawn_legal_targets_bb(
+    board: cb.Board, square_index: int, ptype: int, info: _LegalityInfo
+) -> int:
+    attacks = _nonpawn_attacks_bb(
+        ptype, square_index, board.get_occupancy_bb()
+    ) & ~board.get_color_bb_by_index(info.color_index)
+    if ptype == cpc.KING:
+        return attacks & ~info.king_danger
+    return attacks & info.allowed_targets(square_index)
+
+
+def _generate_nonpawn_legal_standard_moves(
+    board: cb.Board, square_index: int, ptype: int, info: _LegalityInfo
+) -> list[int]:
+    targets = _nonpawn_legal_targets_bb(board, square_index, ptype, info)
+    return [cmc.encode(square_index, target) for target in bb.iter_indexes(targets)]
+
+
+def _generate_castling_moves(board: cb.Board, info: _LegalityInfo) -> list[int]:
+    if info.checkers:
+        return []
+
+    castling_rights = board.castling_rights
+    occupancy = board.get_occupancy_bb()
+    return [
+        cmc.encode(path.king_source, path.king_target)
+        for path in _castling_paths[info.color_index]
+        if castling_rights & path.right
+        and not occupancy & path.empty
+        and not info.king_danger & path.king_path
+    ]
+
+
+def _pawn_capture_targets_bb(board: cb.Board, color_index: int) -> int:
+    targets = board.get_color_bb_by_index(color_index ^ 1)
+    if board.en_passant_target is not None:
+        targets |= bb.from_square(board.en_passant_target)
+    return targets
+
+
+def _pawn_move_codes(source: int, targets: int, promotes: bool) -> list[int]:
+    if promotes:
+        return [
+            cmc.encode(source, target, promotion)
+            for target in bb.iter_indexes(targets)
+            for promotion in _promotion_types
+        ]
+    return [cmc.encode(source, target) for target in bb.iter_indexes(targets)]
+
+
+def _pawn_ranks_and_step(color_index: int) -> tuple[int, int, int]:
+    """
+    Get the pre-promotion rank and the double push rank (as bitboards) and the single
+    step of the pawns of `color_index`.
+    """
 
-    def path_has_no_intermediate_checks(
-        castling_path: Literal["K", "Q", "k", "q"],
-    ) -> bool:
-        return not any(
-            _board_would_be_in_check_after_move(
-                board, c.Move(castling_paths[castling_path]["start"], s)
+    if color_index == cpc.WHITE:
+        return bb.RANK_7, bb.RANK_2, 8
+    return bb.RANK_2, bb.RANK_7, -8
+
+
+def _generate_pawns_pseudolegal_moves(
+    board: cb.Board, square_index: int, color_index: int
+) -> list[int]:
+    pre_promotion_rank, double_push_rank, single_step = _pawn_ranks_and_step(
+        color_index
+    )
+
+    source = square_index
+    occupancy = board.get_occupancy_bb()
+    targets = ca.pawn_attacks_bb(
+        source, cpc.COLORS[color_index]
+    ) & _pawn_capture_targets_bb(board, color_index)
+
+    single_target = source + single_step
+    if not occupancy & (1 << single_target):
+        targets |= 1 << single_target
+        double_target = single_target + single_step
+        if (1 << source) & double_push_rank and not occupancy & (1 << double_target):
+            targets |= 1 << double_target
+
+    return _pawn_move_codes(source, targets, bool((1 << source) & pre_promotion_rank))
+
+
+def _generate_legal_moves(
+    board: cb.Board, square_index: int, info: _LegalityInfo
+) -> list[int]:
+    piece = board.get_piece_code(square_index)
+    if not piece or cpc.color_of(piece) != info.color_index:
+        return []
+
+    ptype = cpc.ptype_value(piece)
+    if ptype == cpc.PAWN:
+        return [
+            move
+            for move in _generate_pawns_pseudolegal_moves(
+                board, square_index, info.color_index
             )
-            for s in castling_paths[castling_path]["king_path"]
-        )
+            if _pawn_move_is_legal(board, info, move)
+        ]
 
-    if color == c.Color.WHITE:
-        if (
-            board.castling_availability.white_kingside
-            and path_is_clear("K")
-            and path_has_no_intermediate_checks("K")
-        ):
-            result.add(c.Move(c.Square.e1, c.Square.g1))
+    result = _generate_nonpawn_legal_standard_moves(board, square_index, ptype, info)
+    if ptype == cpc.KING:
+        result += _generate_castling_moves(board, info)
+    return result
 
-        if (
-            board.castling_availability.white_queenside
-            and path_is_clear("Q")
-            and path_has_no_intermediate_checks("Q")
-        ):
-            result.add(c.Move(c.Square.e1, c.Square.c1))
-    else:
-        if (
-            board.castling_availability.black_kingside
-            and path_is_clear("k")
-            and path_has_no_intermediate_checks("k")
-        ):
-            result.add(c.Move(c.Square.e8, c.Square.g8))
 
-        if (
-            board.castling_availability.black_queenside
-            and path_is_clear("q")
-            and path_has_no_intermediate_checks("q")
-        ):
-            result.add(c.Move(c.Square.e8, c.Square.c8))
-    return result
+def generate_legal_move_codes(board: cb.Board, square: c.Square) -> list[int]:
+    """
+    Same as `generate_legal_moves`, but the moves are encoded as in `cmc`.
+    """
+
+    piece = board.get_piece_code(square.value)
+    if not piece or cpc.color_of(piece) != cpc.color_index(board.active_color):
+        return []
+
+    return _generate_legal_moves(board, square.value, _compute_legality_info(board))
+
 
+def generate_legal_moves(board: cb.Board, square: c.Square) -> set[c.Move]:
+    """
+    Generate all strictly legal moves for the piece located at `square`.
+    """
 
-def _generate_pawns_pseudolegal_moves(board: cb.Board, square: c.Square) -> set[c.Move]:
-    pawn = board.get_piece_by_square(square)
-    assert pawn is not None and pawn.ptype == c.Type.PAWN
+    return {cmc.to_move(move) for move in generate_legal_move_codes(board, square)}
 
-    seventh_rank = 6
-    second_rank = 1
-    result: set[c.Move] = set()
 
-    def append_maybe_promotion_move(move: c.Move) -> None:
-        assert (
-            # pylance wants us to be sure it is not none even though it was
-            # already not none the first time
-            pawn is not None
+def generate_all_legal_move_codes(board: cb.Board) -> list[int]:
+    """
+    Same as `generate_all_legal_moves`, but the moves are encoded as in `cmc`.
+    """
+
+    info = _compute_legality_info(board)
+    return [
+        move
+        for square_index in bb.iter_indexes(
+            board.get_color_bb_by_index(info.color_index)
         )
-        is_promotion = (
-            pawn.color == c.Color.WHITE and square.rank() == seventh_rank
-        ) or (pawn.color == c.Color.BLACK and square.rank() == second_rank)
-        if is_promotion:
-            result.update(
-                [
-                    c.Move(move.source, move.target, promotion=promotable_type)
-                    for promotable_type in [
-                        c.Type.BISHOP,
-                        c.Type.KNIGHT,
-                        c.Type.QUEEN,
-                        c.Type.ROOK,
-                    ]
-                ]
-            )
-        else:
-            result.add(move)
-
-    attacks = ca.generate_attacks(board, square, pawn)
-    for attack in attacks:
-        if (
-            (maybe_attacked_piece := board.get_piece_by_square(attack)) is not None
-            and maybe_attacked_piece.color == pawn.color.invert()
-        ) or attack == board.en_passant_target:
-            move = c.Move(square, attack)
-            append_maybe_promotion_move(move)
-
-    direction_factor = pawn.direction_factor()
-    single_step = c.Square(square.value + 8 * direction_factor)
-    if single_step_is_clear := board.get_piece_by_square(single_step) is None:
-        move = c.Move(square, single_step)
-        append_maybe_promotion_move(move)
-
-    is_first_pawn_move = (
-        pawn.color == c.Color.WHITE and square.rank() == second_rank
-    ) or (pawn.color == c.Color.BLACK and square.rank() == seventh_rank)
-    if single_step_is_clear and is_first_pawn_move:
-        double_step = c.Square(single_step.value + 8 * direction_factor)
-        if board.get_piece_by_square(double_step) is None:
-            move = c.Move(square, double_step)
-            result.add(move)
+        for move in _generate_legal_moves(board, square_index, info)
+    ]
 
-    return result
 
+def generate_all_legal_moves(board: cb.Board) -> set[c.Move]:
+    """
+    Generate all strictly legal moves that are possible given the current board state.
+    """
+
+    return {cmc.to_move(move) for move in generate_all_legal_move_codes(board)}
+
+
+def _generate_pawns_pseudolegal_captures(
+    board: cb.Board, color_index: int
+) -> list[int]:
+    """
+    Generate pawn captures (including en passant) and pawn promotions (including the
+    ones that are pushes) for all pawns of `color_index`.
+    """
 
-def _generate_pseudolegal_moves(board: cb.Board, square: c.Square) -> set[c.Move]:
-    if (
-        piece := board.get_piece_by_square(square)
-    ) is None or piece.color != board.active_color:
-        return set()
+    result: list[int] = []
+    color = cpc.COLORS[color_index]
+    pawns = board.get_pieces_bb_by_code(cpc.encode(cpc.PAWN, color_index))
+    targets = _pawn_capture_targets_bb(board, color_index)
+    pre_promotion_rank, _, single_step = _pawn_ranks_and_step(color_index)
+    occupancy = board.get_occupancy_bb()
 
-    match piece.ptype:
-        case c.Type.ROOK | c.Type.BISHOP | c.Type.QUEEN | c.Type.KNIGHT | c.Type.KING:
-            result = _generate_nonpawn_pseudolegal_standard_moves(board, square)
+    for source in bb.iter_indexes(pawns):
+        attacks = ca.pawn_attacks_bb(source, color) & targets
+        promotes = bool((1 << source) & pre_promotion_rank)
+        push_target = source + single_step
+        if promotes and not occupancy & (1 << push_target):
+            attacks |= 1 << push_target
 
-            if piece.ptype == c.Type.KING:
-                result |= _generate_castling_moves(board, piece.color)
-        case c.Type.PAWN:
-            result = _generate_pawns_pseudolegal_moves(board, square)
+        result += _pawn_move_codes(source, attacks, promotes)
 
     return result
 
 
-def generate_legal_moves(board: cb.Board, square: c.Square) -> set[c.Move]:
+def generate_legal_capture_codes(board: cb.Board) -> list[int]:
     """
-    Generate all strictly legal moves for the piece located at `square`.
+    Same as `generate_legal_captures`, but the moves are encoded as in `cmc`.
     """
 
-    result: set[c.Move] = set()
-    pseudo_moves = _generate_pseudolegal_moves(board, square)
-    for move in pseudo_moves:
-        if not _board_would_be_in_check_after_move(board, move):
-            result.add(move)
+    info = _compute_legality_info(board)
+    color_index = info.color_index
+    enemies = board.get_color_bb_by_index(color_index ^ 1)
+
+    result = [
+        move
+        for move in _generate_pawns_pseudolegal_captures(board, color_index)
+        if _pawn_move_is_legal(board, info, move)
+    ]
+    for ptype in _nonpawn_types:
+        pieces = board.get_pieces_bb_by_code(cpc.encode(ptype, color_index))
+        for source in bb.iter_indexes(pieces):
+            captures = _nonpawn_legal_targets_bb(board, source, ptype, info) & enemies
+            result += [
+                cmc.encode(source, target) for target in bb.iter_indexes(captures)
+            ]
 
     return result
 
 
-def generate_all_legal_moves(board: cb.Board) -> set[c.Move]:
+def generate_legal_captures(board: cb.Board) -> set[c.Move]:
     """
-    Generate all strictly legal moves that are possible given the current board state.
+    Generate all strictly legal captures (including en passant) and promotions
+    (including non-capturing ones) for the side to move.
+
+    Quiet moves are never generated, which makes this much cheaper than filtering
+    the result of `generate_all_legal_moves`.
+    """
+
+    return {cmc.to_move(move) for move in generate_legal_capture_codes(board)}
+
+
+def _generate_pawns_pseudolegal_quiet_moves(
+    board: cb.Board, color_index: int
+) -> list[int]:
+    """
+    Generate single and double pawn pushes for all pawns of `color_index`, except for
+    the ones that promote.
+    """
+
+    result: list[int] = []
+    pawns = board.get_pieces_bb_by_code(cpc.encode(cpc.PAWN, color_index))
+    occupancy = board.get_occupancy_bb()
+    pre_promotion_rank, double_push_rank, single_step = _pawn_ranks_and_step(
+        color_index
+    )
+
+    for source in bb.iter_indexes(pawns & ~pre_promotion_rank):
+        single_target = source + single_step
+        if occupancy & (1 << single_target):
+            continue
+        result.append(cmc.encode(source, single_target))
+
+        double_target = single_target + single_step
+        if (1 << source) & double_push_rank and not occupancy & (1 << double_target):
+            result.append(cmc.encode(source, double_target))
+
+    return result
+
+
+def generate_legal_quiet_move_codes(board: cb.Board) -> list[int]:
+    """
+    Same as `generate_legal_quiet_moves`, but the moves are encoded as in `cmc`.
+    """
+
+    info = _compute_legality_info(board)
+    color_index = info.color_index
+    empty = ~board.get_occupancy_bb()
+
+    result = [
+        move
+        for move in _generate_pawns_pseudolegal_quiet_moves(board, color_index)
+        if _pawn_move_is_legal(board, info, move)
+    ]
+    for ptype in _nonpawn_types:
+        pieces = board.get_pieces_bb_by_code(cpc.encode(ptype, color_index))
+        for source in bb.iter_indexes(pieces):
+            targets = _nonpawn_legal_targets_bb(board, source, ptype, info) & empty
+            result += [
+                cmc.encode(source, target) for target in bb.iter_indexes(targets)
+            ]
+
+    return result + _generate_castling_moves(board, info)
+
+
+def generate_legal_quiet_moves(board: cb.Board) -> set[c.Move]:
+    """
+    Generate all strictly legal moves for the side to move that are neither captures
+    nor promotions, i.e. the complement of `generate_legal_captures`.
     """
 
-    return {move for square in c.Square for move in generate_legal_moves(board, square)}
+    return {cmc.to_move(move) for move in generate_legal_quiet_move_codes(board)}
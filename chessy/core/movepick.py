@@ -0,0 +1,100 @@
+"""
+Move ordering for the search. Alpha-beta prunes the most when the best move is tried
+first, and most cutoffs happen on the first one or two moves, so moves are generated
+in stages, from the most to the least promising, and only when they are asked for.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+
+import chessy.core.bitboard as bb
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.movegen as cm
+import chessy.core.piececode as cpc
+import chessy.core.see as cs
+
+# All moves below are encoded as in `cmc`.
+
+
+def most_valuable_victims_first(board: cb.Board, moves: Iterable[int]) -> list[int]:
+    """
+    Order captures by MVV-LVA: most valuable victim first and, among captures of the
+    same victim, least valuable attacker first.
+    """
+
+    values = cpc.VALUES
+
+    def key(move: int) -> tuple[float, float]:
+        attacker = board.get_piece_code(cmc.source(move))
+        return (-cs.material_gain(board, move), values[attacker])
+
+    return sorted(moves, key=key)
+
+
+def _is_legal(board: cb.Board, move: int) -> bool:
+    # Moves from other positions (e.g. the hash move, after a key collision) can be
+    # anything, so they are checked against the generator.
+    return move in cm.generate_legal_move_codes(board, bb.SQUARES[cmc.source(move)])
+
+
+def staged_moves(
+    board: cb.Board,
+    hash_move: int | None = None,
+    killers: Iterable[int] = (),
+    history: Callable[[int], int] | None = None,
+    counter_move: int | None = None,
+) -> Iterator[int]:
+    """
+    Lazily yield every legal move of the side to move, each exactly once, in this
+    order:
+
+    1. `hash_move`, the best move found by a previous search of this position.
+    2. Captures and promotions that do not lose material (according to SEE),
+       ordered by MVV-LVA.
+    3. `killers`: quiet moves that caused cutoffs in sibling positions.
+    4. `counter_move`: a quiet move that refuted the opponent's last move before.
+    5. Remaining quiet moves, by descending `history` score (if given).
+    6. Captures that lose material, least losing first.
+
+    The board can be freely changed between iterations, as long as it is back in the
+    same position when the next move is requested.
+    """
+
+    if hash_move is not None and _is_legal(board, hash_move):
+        yield hash_move
+
+    captures = set(cm.generate_legal_capture_codes(board))
+    captures.discard(hash_move)
+    exchanges = {move: cs.static_exchange_evaluation(board, move) for move in captures}
+    yield from most_valuable_victims_first(
+        board, [move for move, see in exchanges.items() if see >= 0]
+    )
+
+    refutations = killers if counter_move is None else (*killers, counter_move)
+    yielded_refutations: set[int] = set()
+    for refutation in refutations:
+        if (
+            refutation != hash_move
+            and refutation not in captures
+            and refutation not in yielded_refutations
+            and _is_legal(board, refutation)
+        ):
+            yielded_refutations.add(refutation)
+            yield refutation
+
+    quiets = [
+        move
+        for move in cm.generate_legal_quiet_move_codes(board)
+        if move != hash_move and move not in yielded_refutations
+    ]
+    if history is not None:
+        quiets.sort(key=history, reverse=True)
+    yield from quiets
+
+    yield from sorted(
+        (move for move, see in exchanges.items() if see < 0),
+        key=lambda move: exchanges[move],
+        reverse=True,
+    )
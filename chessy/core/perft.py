@@ -0,0 +1,219 @@
+"""
+Perft: count the leaf nodes of the legal move tree up to a given depth. The counts of
+many positions are well known, which makes it the standard way of checking (and
+benchmarking) move generation and make/unmake.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import chessy.core as c
+import chessy.core.atkgen as ca
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.movegen as cm
+
+
+@dataclass(frozen=True, slots=True)
+class PerftPosition:
+    name: str
+    fen: str
+    # The i-th element is the number of nodes at depth i + 1.
+    expected_nodes: tuple[int, ...]
+
+
+# See https://www.chessprogramming.org/Perft_Results.
+STANDARD_POSITIONS = (
+    PerftPosition(
+        "Initial position",
+        cb.INITIAL_POSITION_FEN,
+        (20, 400, 8902, 197281, 4865609),
+    ),
+    PerftPosition(
+        "Kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (48, 2039, 97862, 4085603),
+    ),
+    PerftPosition(
+        "Position 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        (14, 191, 2812, 43238, 674624),
+    ),
+    PerftPosition(
+        "Position 4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        (6, 264, 9467, 422333),
+    ),
+    PerftPosition(
+        "Position 5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        (44, 1486, 62379, 2103487),
+    ),
+    PerftPosition(
+        "Position 6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        (46, 2079, 89890, 3894594),
+    ),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class PerftReport:
+    divide: dict[c.Move, int]
+    nodes: int
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> int:
+        if self.seconds == 0:
+            return 0
+        return int(self.nodes / self.seconds)
+
+    def make_text_lines(self) -> list[str]:
+        """
+        Format the report in the same style as other engines' perft output, so that
+        divides can be compared with a diff.
+        """
+
+        lines = [
+            f"{move.to_long_algebraic_notation()}: {nodes}"
+            for move, nodes in sorted(
+                self.divide.items(),
+                key=lambda item: item[0].to_long_algebraic_notation(),
+            )
+        ]
+        lines += [
+            "",
+            f"Nodes searched: {self.nodes}",
+            f"Time: {self.seconds:.3f}s",
+            f"Nodes/second: {self.nodes_per_second}",
+        ]
+        return lines
+
+
+def perft(board: cb.Board, depth: int) -> int:
+    """
+    Count the leaf nodes of the legal move tree of `board` at `depth`. The board is
+    left in its original state.
+    """
+
+    if depth == 0:
+        return 1
+
+    moves = cm.generate_all_legal_move_codes(board)
+    if depth == 1:
+        # Bulk counting: there is no need to make the last moves.
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_legal_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board: cb.Board, depth: int) -> dict[c.Move, int]:
+    """
+    Same as `perft`, but the nodes are split by root move. Comparing this against
+    another engine is the easiest way of narrowing down a move generation bug.
+
+    ValueError is raised if `depth` is lower than 1.
+    """
+
+    if depth < 1:
+        raise ValueError("The minimum allowed depth is 1")
+
+    result: dict[c.Move, int] = {}
+    for move in cm.generate_all_legal_move_codes(board):
+        board.make_legal_move(move)
+        result[cmc.to_move(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return result
+
+
+# `parallel_divide` hands out one job per node at this depth.
+_split_depth = 2
+# Shallower divides take a few milliseconds, less than handing them out to workers.
+_min_parallel_depth = 4
+
+
+def _perft_worker(position: bytes, moves: tuple[int, ...], depth: int) -> int:
+    board = cb.Board.from_bytes(position)
+    for move in moves:
+        board.make_legal_move(move)
+    return perft(board, depth)
+
+
+def create_executor(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Create a pool of `max_workers` processes (by default, one per CPU) for
+    `parallel_divide`. Starting the processes easily takes longer than a small
+    divide, so the same pool should be used for every divide of a run.
+    """
+
+    return ProcessPoolExecutor(max_workers, initializer=ca.force_init_all_tables)
+
+
+def parallel_divide(
+    board: cb.Board, depth: int, executor: Executor
+) -> dict[c.Move, int]:
+    """
+    Same as `divide`, but the work is spread across the processes of `executor`
+    (see `create_executor`).
+
+    For depths above `_split_depth` the tree is split there rather than at the root:
+    root moves can have wildly different subtree sizes, and having many smaller jobs
+    keeps every worker busy until the end.
+
+    ValueError is raised if `depth` is lower than 1.
+    """
+
+    if depth < 1:
+        raise ValueError("The minimum allowed depth is 1")
+
+    # Much cheaper to send to the workers than the board itself.
+    position = board.to_bytes()
+    jobs: list[tuple[int, ...]] = []
+    result: dict[int, int] = defaultdict(int)
+    for move in cm.generate_all_legal_move_codes(board):
+        if depth <= _split_depth:
+            jobs.append((move,))
+            continue
+
+        board.make_legal_move(move)
+        replies = cm.generate_all_legal_move_codes(board)
+        board.unmake_move()
+        # Keep moves without replies in the result (with 0 nodes), like `divide`.
+        result[move] = 0
+        jobs += [(move, reply) for reply in replies]
+
+    root_moves: dict[Future[int], int] = {}
+    for moves in jobs:
+        future = executor.submit(_perft_worker, position, moves, depth - len(moves))
+        root_moves[future] = moves[0]
+    for future in as_completed(root_moves):
+        result[root_moves[future]] += future.result()
+
+    return {cmc.to_move(move): nodes for move, nodes in result.items()}
+
+
+def timed_divide(
+    board: cb.Board, depth: int, executor: Executor | None = None
+) -> PerftReport:
+    """
+    Run `divide` and time it. If an `executor` is given, `parallel_divide` is used
+    instead for depths of at least `_min_parallel_depth`.
+    """
+
+    start = time.perf_counter()
+    if executor is not None and depth >= _min_parallel_depth:
+        result = parallel_divide(board, depth, executor)
+    else:
+        result = divide(board, depth)
+    seconds = time.perf_counter() - start
+    return PerftReport(result, sum(result.values()), seconds)
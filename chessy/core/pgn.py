@@ -0,0 +1,156 @@
+"""
+Streaming reader of PGN (Portable Game Notation) files. Games are read one at a time,
+and only their tags and main line are kept, so memory use does not depend on the size
+of the file.
+
+See http://www.saremba.de/chessgml/standards/pgn/pgn-complete.htm.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+import chessy.core as c
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.san as csan
+
+
+class PgnError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class PgnGame:
+    tags: dict[str, str] = field(default_factory=dict)
+    # The main line, in SAN. Comments, variations and NAGs are dropped.
+    moves: list[str] = field(default_factory=list)
+    # As written in the movetext, or "*" if it is missing.
+    result: str = "*"
+
+    def initial_board(self) -> cb.Board:
+        """
+        Create the board the game starts from, which is the initial position unless
+        the `FEN` tag says otherwise.
+
+        Can raise the same exceptions as `cb.Board.from_fen`.
+        """
+
+        return cb.Board.from_fen(self.tags.get("FEN", cb.INITIAL_POSITION_FEN))
+
+    def replay(self) -> Iterator[tuple[cb.Board, c.Move]]:
+        """
+        Lazily go through the main line, yielding each move along with the board
+        right before it is made. The same board is updated in place (through the
+        trusted `cb.Board.make_legal_move`), so use `cb.Board.clone` to keep a
+        position around.
+
+        `PgnError` is raised if a move cannot be resolved, see `csan.parse`.
+        """
+
+        board = self.initial_board()
+        for ply, san in enumerate(self.moves):
+            try:
+                move = csan.parse_code(board, san)
+            except csan.SanError as e:
+                move_number = board.fullmove_number
+                raise PgnError(f"Move {move_number} (ply {ply + 1}): {e}") from None
+            yield board, cmc.to_move(move)
+            board.make_legal_move(move)
+
+
+# Every token of a line, once comments are removed. Tag pairs are expected to be on
+# lines of their own, like every PGN exporter writes them.
+_token_pattern = re.compile(
+    r'(?P<tag>\[\s*(?P<tag_name>\w+)\s+"(?P<tag_value>(?:[^"\\]|\\.)*)"\s*\])'
+    r"|(?P<open_variation>\()|(?P<close_variation>\))|(?P<nag>\$\d+)"
+    r"|(?P<result>1-0|0-1|1/2-1/2|\*)|(?P<move_number>\d+\.+)|(?P<san>[^\s()$]+)"
+)
+_comment_start_pattern = re.compile(r"[{;]")
+_tag_escape_pattern = re.compile(r"\\(.)")
+
+
+def _strip_comments(line: str, in_comment: bool) -> tuple[str, bool]:
+    """
+    Remove the comments of `line`, which starts inside a `{...}` comment if
+    `in_comment` is set. Return the rest of the line and whether a `{...}` comment is
+    still open at its end.
+    """
+
+    if not in_comment and line.lstrip().startswith("["):
+        return line, False
+
+    parts: list[str] = []
+    position = 0
+    while True:
+        if in_comment:
+            if (end := line.find("}", position)) == -1:
+                return "".join(parts), True
+            position = end + 1
+            in_comment = False
+
+        comment = _comment_start_pattern.search(line, position)
+        if comment is None:
+            parts.append(line[position:])
+            return "".join(parts), False
+
+        parts.append(line[position : comment.start()])
+        if comment[0] == ";":
+            # Comment until the end of the line.
+            return "".join(parts), False
+        in_comment = True
+        position = comment.end()
+
+
+def _tokens(lines: Iterable[str]) -> Iterator[re.Match[str]]:
+    """
+    Yield the tokens of the PGN `lines` (see `_token_pattern`), without comments and
+    escaped lines.
+    """
+
+    in_comment = False
+    for line in lines:
+        if not in_comment and line.startswith("%"):
+            # Escaped line, meant for other software.
+            continue
+
+        text, in_comment = _strip_comments(line, in_comment)
+        yield from _token_pattern.finditer(text)
+
+
+def read_games(lines: Iterable[str]) -> Iterator[PgnGame]:
+    """
+    Lazily read the games of `lines` (e.g. an open PGN file), one at a time.
+
+    Games end with their result. A game whose result is missing ends when the tags of
+    the next one start, or at the end of `lines`. SAN moves are not checked here, see
+    `PgnGame.replay` for that.
+    """
+
+    game = PgnGame()
+    variation_depth = 0
+    for token in _tokens(lines):
+        match token.lastgroup:
+            case "tag":
+                if game.moves:
+                    yield game
+                    game = PgnGame()
+                    variation_depth = 0
+                game.tags[token["tag_name"]] = _tag_escape_pattern.sub(
+                    r"\1", token["tag_value"]
+                )
+            case "open_variation":
+                variation_depth += 1
+            case "close_variation":
+                variation_depth = max(variation_depth - 1, 0)
+            case "san" if variation_depth == 0:
+                game.moves.append(token[0])
+            case "result" if variation_depth == 0:
+                game.result = token[0]
+                yield game
+                game = PgnGame()
+
+    if game.tags or game.moves:
+        yield game
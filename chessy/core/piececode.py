@@ -0,0 +1,82 @@
+"""
+Compact integer encoding of pieces and colors, used on the engine's hot paths instead
+of `c.Piece` and `c.Color` (whose construction, comparison and hashing all run Python
+code).
+
+A piece code is `color index * 8 + type value`, where the color index is 0 for white
+and 1 for black and the type value is `c.Type(...).value` (1 to 6). `EMPTY` (0) stands
+for no piece, so a piece code can be tested for truthiness.
+"""
+
+from __future__ import annotations
+
+import chessy.core as c
+
+EMPTY = 0
+
+WHITE = 0
+BLACK = 1
+
+PAWN = c.Type.PAWN.value
+KNIGHT = c.Type.KNIGHT.value
+BISHOP = c.Type.BISHOP.value
+ROOK = c.Type.ROOK.value
+QUEEN = c.Type.QUEEN.value
+KING = c.Type.KING.value
+
+TYPE_MASK = 0x7
+COLOR_SHIFT = 3
+# Every piece code is below this.
+LIMIT = 2 << COLOR_SHIFT
+
+COLORS = (c.Color.WHITE, c.Color.BLACK)
+_TYPES: tuple[c.Type | None, ...] = (None, *c.Type)
+
+# The material value (in pawns) of every piece code, indexed by the code itself (so
+# `EMPTY` is worth 0). It is the same for both colors.
+_TYPE_VALUES = (0.0, 1.0, 3.0, 3.0, 5.0, 9.0, 200.0, 0.0)
+VALUES = _TYPE_VALUES * 2
+
+
+def color_index(color: c.Color) -> int:
+    return WHITE if color is c.Color.WHITE else BLACK
+
+
+def encode(ptype_value: int, color_idx: int) -> int:
+    return color_idx << COLOR_SHIFT | ptype_value
+
+
+def ptype_value(code: int) -> int:
+    return code & TYPE_MASK
+
+
+def color_of(code: int) -> int:
+    """Get the color index of the piece `code`, which must not be `EMPTY`."""
+    return code >> COLOR_SHIFT
+
+
+def _build_pieces_table() -> list[c.Piece | None]:
+    table: list[c.Piece | None] = [None] * LIMIT
+    for color in c.Color:
+        for ptype in c.Type:
+            table[encode(ptype.value, color_index(color))] = c.Piece(ptype, color)
+    return table
+
+
+_pieces_table = _build_pieces_table()
+
+
+def from_piece(piece: c.Piece | None) -> int:
+    if piece is None:
+        return EMPTY
+    return encode(piece.ptype.value, color_index(piece.color))
+
+
+def to_piece(code: int) -> c.Piece | None:
+    return _pieces_table[code]
+
+
+def to_type(code: int) -> c.Type:
+    ptype = _TYPES[code & TYPE_MASK]
+    assert ptype is not None
+    return ptype
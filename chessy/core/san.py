@@ -0,0 +1,126 @@
+"""
+Standard Algebraic Notation (SAN), the move notation used by PGN and by humans, e.g.
+`Nbd7`, `exd5`, `e8=Q+` or `O-O`. Unlike long algebraic notation, a SAN move can only
+be understood together with the position it is played in.
+"""
+
+from __future__ import annotations
+
+import re
+
+import chessy.core as c
+import chessy.core.bitboard as bb
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.movegen as cm
+import chessy.core.piececode as cpc
+
+
+class SanError(Exception):
+    pass
+
+
+class InvalidSanError(SanError):
+    pass
+
+
+class IllegalSanError(SanError):
+    pass
+
+
+class AmbiguousSanError(SanError):
+    pass
+
+
+_san_pattern = re.compile(
+    r"(?P<piece>[NBRQK])?(?P<file>[a-h])?(?P<rank>[1-8])?x?"
+    r"(?P<target>[a-h][1-8])(?:=?(?P<promotion>[NBRQ]))?"
+)
+_piece_types = {
+    "N": c.Type.KNIGHT,
+    "B": c.Type.BISHOP,
+    "R": c.Type.ROOK,
+    "Q": c.Type.QUEEN,
+    "K": c.Type.KING,
+}
+# Check, mate and annotation symbols, which do not change the meaning of the move.
+_san_suffixes = "+#!?"
+# Indexed by color index.
+_castling_moves = (
+    {
+        "O-O": cmc.encode(c.Square.e1.value, c.Square.g1.value),
+        "O-O-O": cmc.encode(c.Square.e1.value, c.Square.c1.value),
+    },
+    {
+        "O-O": cmc.encode(c.Square.e8.value, c.Square.g8.value),
+        "O-O-O": cmc.encode(c.Square.e8.value, c.Square.c8.value),
+    },
+)
+
+
+def _resolve(san: str, candidates: list[int]) -> int:
+    if not candidates:
+        raise IllegalSanError(f"{san} is not a legal move.")
+    if len(candidates) > 1:
+        raise AmbiguousSanError(f"{san} matches more than one legal move.")
+    return candidates[0]
+
+
+def parse_code(board: cb.Board, san: str) -> int:
+    """
+    Same as `parse`, but the move is encoded as in `cmc`. Since it is legal, it can be
+    made with `cb.Board.make_legal_move`.
+    """
+
+    stripped = san.rstrip(_san_suffixes).removesuffix("e.p.").strip()
+    color_index = cpc.color_index(board.active_color)
+    legal_moves = cm.generate_all_legal_move_codes(board)
+
+    if (castling := stripped.replace("0", "O")) in _castling_moves[color_index]:
+        move = _castling_moves[color_index][castling]
+        # The same squares could be the move of another piece.
+        is_king_move = board.get_piece_code(cmc.source(move)) == cpc.encode(
+            cpc.KING, color_index
+        )
+        return _resolve(san, [move] if is_king_move and move in legal_moves else [])
+
+    if (match := _san_pattern.fullmatch(stripped)) is None:
+        raise InvalidSanError(f"{san} is not a valid SAN move.")
+
+    ptype = c.Type.PAWN if match["piece"] is None else _piece_types[match["piece"]]
+    target = c.Square[match["target"]].value
+    promotion = None if match["promotion"] is None else _piece_types[match["promotion"]]
+    source_file = match["file"]
+    source_rank = match["rank"]
+
+    candidates = []
+    for move in legal_moves:
+        source = cmc.source(move)
+        if (
+            cmc.target(move) != target
+            or cpc.ptype_value(board.get_piece_code(source)) != ptype.value
+            or cmc.promotion(move) != promotion
+        ):
+            continue
+
+        source_name = bb.SQUARES[source].name
+        if (source_file is None or source_name[0] == source_file) and (
+            source_rank is None or source_name[1] == source_rank
+        ):
+            candidates.append(move)
+
+    return _resolve(san, candidates)
+
+
+def parse(board: cb.Board, san: str) -> c.Move:
+    """
+    Find the legal move of `board` written as `san`. Disambiguation (e.g. `Nbd7` or
+    `R1e2`) is only required when more than one piece could make the move, but
+    redundant disambiguation is accepted, as are check, mate and annotation symbols,
+    promotions without `=` and castling written with zeros.
+
+    `InvalidSanError` is raised if `san` is not SAN at all, `IllegalSanError` if it
+    matches no legal move and `AmbiguousSanError` if it matches more than one.
+    """
+
+    return cmc.to_move(parse_code(board, san))
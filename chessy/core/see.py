@@ -0,0 +1,130 @@
+"""
+Static exchange evaluation (SEE): the material balance of a sequence of captures on a
+single square, assuming both sides always recapture with their least valuable piece
+and may stop capturing whenever continuing would lose material.
+"""
+
+from __future__ import annotations
+
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.piececode as cpc
+
+# Type values, least valuable first.
+_attacker_order = (
+    cpc.PAWN,
+    cpc.KNIGHT,
+    cpc.BISHOP,
+    cpc.ROOK,
+    cpc.QUEEN,
+    cpc.KING,
+)
+
+
+def _attackers_to_bb(board: cb.Board, square_index: int, occupancy: int) -> int:
+    """
+    Get every piece, of both colors, attacking `square_index` when the occupied
+    squares are `occupancy`. Pieces outside of `occupancy` are included too, so
+    callers must mask them out.
+    """
+
+    attackers_to = board.attackers_to_index
+    return attackers_to(square_index, cpc.WHITE, occupancy) | attackers_to(
+        square_index, cpc.BLACK, occupancy
+    )
+
+
+def _is_en_passant(board: cb.Board, source_piece: int, target: int) -> bool:
+    en_passant_target = board.en_passant_target
+    return (
+        en_passant_target is not None
+        and target == en_passant_target.value
+        and source_piece & cpc.TYPE_MASK == cpc.PAWN
+    )
+
+
+def material_gain(board: cb.Board, move: int) -> float:
+    """
+    Get the value of the material `move` (encoded as in `cmc`) wins right away (the
+    captured piece and the promotion), ignoring any recaptures.
+    """
+
+    values = cpc.VALUES
+    target = cmc.target(move)
+    if captured := board.get_piece_code(target):
+        gain = values[captured]
+    elif _is_en_passant(board, board.get_piece_code(cmc.source(move)), target):
+        gain = values[cpc.PAWN]
+    else:
+        gain = 0
+
+    if promotion := cmc.promotion_ptype_value(move):
+        gain += values[promotion] - values[cpc.PAWN]
+
+    return gain
+
+
+def static_exchange_evaluation(board: cb.Board, move: int) -> float:
+    """
+    Evaluate the material outcome of `move` (encoded as in `cmc`) for the side making
+    it, in the same units as `cpc.VALUES`. A negative result means the move loses
+    material.
+
+    `move` is assumed to be legal. Pins and checks are not taken into account.
+    """
+
+    values = cpc.VALUES
+    source = cmc.source(move)
+    source_piece = board.get_piece_code(source)
+    assert source_piece != cpc.EMPTY
+    side = cpc.color_of(source_piece)
+
+    target = cmc.target(move)
+    occupancy = board.get_occupancy_bb() ^ (1 << source)
+    captured_piece = board.get_piece_code(target)
+    if not captured_piece and _is_en_passant(board, source_piece, target):
+        captured_square = target - 8 if side == cpc.WHITE else target + 8
+        occupancy ^= 1 << captured_square
+        captured_piece = cpc.encode(cpc.PAWN, side ^ 1)
+
+    gains = [values[captured_piece]]
+    on_target_value = values[source_piece]
+    if promotion := cmc.promotion_ptype_value(move):
+        gains[0] += values[promotion] - values[cpc.PAWN]
+        on_target_value = values[promotion]
+
+    attackers = _attackers_to_bb(board, target, occupancy) & occupancy
+    side ^= 1
+    while True:
+        # Speculatively assume `side` captures whatever is on the target. This is
+        # discarded below if it turns out `side` has nothing to capture with.
+        gains.append(on_target_value - gains[-1])
+        if max(-gains[-2], gains[-1]) < 0:
+            # Neither side can improve by continuing.
+            break
+
+        side_attackers = attackers & board.get_color_bb_by_index(side)
+        for ptype in _attacker_order:
+            if candidates := side_attackers & board.get_pieces_bb_by_code(
+                cpc.encode(ptype, side)
+            ):
+                break
+        else:
+            break
+
+        if ptype == cpc.KING and attackers & board.get_color_bb_by_index(side ^ 1):
+            # The king cannot capture into a defended square.
+            break
+
+        occupancy ^= candidates & -candidates
+        on_target_value = values[ptype]
+        # Removing a piece may reveal sliders behind it (x-rays).
+        attackers = _attackers_to_bb(board, target, occupancy) & occupancy
+        side ^= 1
+
+    gains.pop()
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+
+    return gains[0]
@@ -1,7 +1,10 @@
+import random
+
 import pytest
 
 import chessy.core as c
 import chessy.core.atkgen as ca
+import chessy.core.bitboard as bb
 import chessy.core.board as cb
 
 
@@ -20,6 +23,8 @@ def assert_eq_after_atk_gen(
     )
     attacks = ca.generate_attacks(board, initial_square, piece)
     assert attacks == expected_attacks
+    attacks_bb = ca.generate_attacks_bb(board, initial_square, piece)
+    assert bb.to_squares(attacks_bb) == expected_attacks
 
 
 @pytest.mark.parametrize(
@@ -235,3 +240,48 @@ def test_king_attacks(
 ) -> None:
     piece = c.Piece(c.Type.KING, color=None)  # type: ignore
     assert_eq_after_atk_gen(None, initial_square, piece, expected_attacks)
+
+
+def naive_sliding_attacks(
+    square: c.Square, occupancy: int, rays: list[tuple[int, int]]
+) -> int:
+    result = bb.EMPTY
+    for rank_step, file_step in rays:
+        rank, file = square.rank() + rank_step, square.file() + file_step
+        while 0 <= rank <= 7 and 0 <= file <= 7:  # noqa: PLR2004
+            result |= 1 << (rank * 8 + file)
+            if occupancy & (1 << (rank * 8 + file)):
+                break
+            rank, file = rank + rank_step, file + file_step
+    return result
+
+
+def test_magic_lookups_match_naive_attacks() -> None:
+    rook_rays = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    bishop_rays = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+    rng = random.Random(0)  # noqa: S311
+    for _ in range(50):
+        occupancy = rng.getrandbits(64) & rng.getrandbits(64)
+        for square in c.Square:
+            rook = naive_sliding_attacks(square, occupancy, rook_rays)
+            bishop = naive_sliding_attacks(square, occupancy, bishop_rays)
+            assert ca.rook_attacks_bb(square.value, occupancy) == rook
+            assert ca.bishop_attacks_bb(square.value, occupancy) == bishop
+            assert ca.queen_attacks_bb(square.value, occupancy) == rook | bishop
+
+
+@pytest.mark.parametrize(
+    "square1,square2,expected",
+    [
+        (c.Square.a1, c.Square.a4, {c.Square.a2, c.Square.a3}),
+        (c.Square.h3, c.Square.d3, {c.Square.e3, c.Square.f3, c.Square.g3}),
+        (c.Square.b2, c.Square.e5, {c.Square.c3, c.Square.d4}),
+        (c.Square.g2, c.Square.e4, {c.Square.f3}),
+        (c.Square.d4, c.Square.d5, set()),
+        (c.Square.a1, c.Square.b3, set()),
+        (c.Square.a1, c.Square.h7, set()),
+    ],
+)
+def test_between(square1: c.Square, square2: c.Square, expected: set[c.Square]) -> None:
+    assert bb.to_squares(ca.between_bb(square1.value, square2.value)) == expected
+    assert bb.to_squares(ca.between_bb(square2.value, square1.value)) == expected
@@ -0,0 +1,34 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.bitboard as bb
+
+
+@pytest.mark.parametrize(
+    "squares",
+    [
+        set(),
+        {c.Square.a1},
+        {c.Square.h8},
+        {c.Square.a1, c.Square.e4, c.Square.h8},
+        set(c.Square),
+    ],
+)
+def test_squares_roundtrip(squares: set[c.Square]) -> None:
+    assert bb.to_squares(bb.from_squares(squares)) == squares
+
+
+def test_iter_indexes_order() -> None:
+    value = bb.from_squares([c.Square.h8, c.Square.c1, c.Square.e4])
+    assert list(bb.iter_indexes(value)) == [
+        c.Square.c1.value,
+        c.Square.e4.value,
+        c.Square.h8.value,
+    ]
+
+
+def test_lsb_and_popcount() -> None:
+    value = bb.from_squares([c.Square.d5, c.Square.b2, c.Square.g7])
+    assert bb.lsb(value) == c.Square.b2.value
+    assert bb.popcount(value) == 3  # noqa: PLR2004
+    assert bb.popcount(bb.FULL) == 64  # noqa: PLR2004
@@ -1,7 +1,9 @@
 import pytest
 
 import chessy.core as c
+import chessy.core.bitboard as bb
 import chessy.core.board as cb
+import chessy.core.movegen as cm
 
 
 def assert_eq_after_move(initial_fen: str, move: c.Move, expected_fen: str) -> None:
@@ -196,6 +198,55 @@ def test_king_in_check(fen: str, is_check: bool) -> None:
     assert b.is_in_check() == is_check
 
 
+@pytest.mark.parametrize(
+    "fen,square,color,expected",
+    [
+        (
+            "4k3/8/8/1b6/8/2N2p2/4R3/4K3 w - - 0 1",
+            c.Square.e2,
+            c.Color.BLACK,
+            {c.Square.b5, c.Square.f3},
+        ),
+        (
+            "4k3/8/8/1b6/8/2N2p2/4R3/4K3 w - - 0 1",
+            c.Square.e2,
+            c.Color.WHITE,
+            {c.Square.c3, c.Square.e1},
+        ),
+        (
+            "4k3/8/8/1b6/8/2N2p2/4R3/4K3 w - - 0 1",
+            c.Square.e4,
+            c.Color.WHITE,
+            {c.Square.c3, c.Square.e2},
+        ),
+        # The rook behind the queen is blocked.
+        (
+            "4k3/8/8/8/8/8/8/RQ2K3 w - - 0 1",
+            c.Square.d1,
+            c.Color.WHITE,
+            {c.Square.b1, c.Square.e1},
+        ),
+        ("4k3/8/8/8/8/8/8/RQ2K3 w - - 0 1", c.Square.h8, c.Color.WHITE, set()),
+    ],
+)
+def test_attackers_to(
+    fen: str, square: c.Square, color: c.Color, expected: set[c.Square]
+) -> None:
+    b = cb.Board.from_fen(fen)
+    assert bb.to_squares(b.attackers_to(square, color)) == expected
+    assert b.is_square_attacked(square, color) == bool(expected)
+
+
+def test_attackers_to_with_occupancy() -> None:
+    b = cb.Board.from_fen("4k3/8/8/8/8/8/8/RQ2K3 w - - 0 1")
+    occupancy = b.get_occupancy_bb() ^ bb.from_square(c.Square.b1)
+    assert bb.to_squares(b.attackers_to(c.Square.d1, c.Color.WHITE, occupancy)) == {
+        c.Square.a1,
+        c.Square.b1,
+        c.Square.e1,
+    }
+
+
 @pytest.mark.parametrize(
     "initial_fen,move",
     [
@@ -273,3 +324,240 @@ def test_move_rollback(initial_fen: str, moves: list[c.Move]) -> None:
         b.unmake_move()
     expected = cb.Board.from_fen(initial_fen)
     assert b == expected
+
+
+def test_castling_availability_is_a_copy() -> None:
+    b = cb.Board.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    b.castling_availability.disable_for_color(c.Color.WHITE)
+    assert b.castling_availability == c.CastlingAvailability(True, True, True, True)
+
+    b.make_move(c.Move(c.Square.a1, c.Square.a8))
+    assert b.castling_availability == c.CastlingAvailability(True, False, True, False)
+    b.unmake_move()
+    assert b.castling_availability == c.CastlingAvailability(True, True, True, True)
+
+
+def test_null_move(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cb.Board, "verify_zobrist_key", True)
+    initial_fen = "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 2"
+    b = cb.Board.from_fen(initial_fen)
+    b.make_null_move()
+    assert b.to_fen() == "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq - 1 3"
+    assert b.zobrist_key == cb.Board.from_fen(b.to_fen()).zobrist_key
+
+    b.make_move(c.Move(c.Square.g1, c.Square.f3))
+    with pytest.raises(ValueError):
+        b.unmake_null_move()
+    b.unmake_move()
+    b.unmake_null_move()
+    assert b == cb.Board.from_fen(initial_fen)
+
+    b.make_null_move()
+    b.unmake_move()
+    assert b == cb.Board.from_fen(initial_fen)
+    with pytest.raises(ValueError):
+        b.unmake_null_move()
+
+
+def assert_bitboards_match_state(b: cb.Board) -> None:
+    for ptype in c.Type:
+        for color in c.Color:
+            expected = {
+                sq
+                for sq in c.Square
+                if b.get_piece_by_square(sq) == c.Piece(ptype, color)
+            }
+            assert bb.to_squares(b.get_pieces_bb(ptype, color)) == expected
+            assert b.get_piece_count(ptype, color) == len(expected)
+            if ptype == c.Type.KING:
+                assert {b.get_king_square(color)} == expected
+
+    for color in c.Color:
+        expected = {
+            sq
+            for sq in c.Square
+            if (p := b.get_piece_by_square(sq)) is not None and p.color == color
+        }
+        assert bb.to_squares(b.get_color_bb(color)) == expected
+
+    assert bb.to_squares(b.get_occupancy_bb()) == {
+        sq for sq in c.Square if b.get_piece_by_square(sq) is not None
+    }
+
+
+# Sequences of moves (from the given FEN) that cover en passant, castling, captures
+# and promotions.
+_special_move_sequences = [
+    (
+        "rn1qkbnr/pbpppppp/1p6/4P3/8/N7/PPPP1PPP/R1BQKBNR b KQkq - 0 1",
+        [
+            c.Move(c.Square.f7, c.Square.f5),
+            c.Move(c.Square.e5, c.Square.f6),
+            c.Move(c.Square.g8, c.Square.f6),
+        ],
+    ),
+    (
+        "4k2r/R4p2/8/8/8/8/8/4K2R w Kk - 0 1",
+        [
+            c.Move(c.Square.e1, c.Square.g1),
+            c.Move(c.Square.e8, c.Square.g8),
+            c.Move(c.Square.f1, c.Square.f7),
+        ],
+    ),
+    (
+        "rnbqkbnr/pPpppppp/8/8/8/8/PPPPPPpP/RNBQKB1R b KQkq - 0 1",
+        [
+            c.Move(c.Square.g2, c.Square.g1, promotion=c.Type.ROOK),
+            c.Move(c.Square.b7, c.Square.a8, promotion=c.Type.KNIGHT),
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize("initial_fen,moves", _special_move_sequences)
+def test_piece_tracking_follows_moves(initial_fen: str, moves: list[c.Move]) -> None:
+    b = cb.Board.from_fen(initial_fen)
+    assert_bitboards_match_state(b)
+    for move in moves:
+        b.make_move(move)
+        assert_bitboards_match_state(b)
+    for _ in moves:
+        b.unmake_move()
+        assert_bitboards_match_state(b)
+
+
+@pytest.mark.parametrize("initial_fen,moves", _special_move_sequences)
+def test_zobrist_key_incremental_updates(
+    initial_fen: str, moves: list[c.Move], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cb.Board, "verify_zobrist_key", True)
+    b = cb.Board.from_fen(initial_fen)
+    initial_key = b.zobrist_key
+    for move in moves:
+        b.make_move(move)
+    for _ in moves:
+        b.unmake_move()
+    assert b.zobrist_key == initial_key
+
+
+def test_zobrist_key_transpositions() -> None:
+    initial_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    b1 = cb.Board.from_fen(initial_fen)
+    b2 = cb.Board.from_fen(initial_fen)
+    for move in [
+        c.Move(c.Square.g1, c.Square.f3),
+        c.Move(c.Square.g8, c.Square.f6),
+        c.Move(c.Square.b1, c.Square.c3),
+    ]:
+        b1.make_move(move)
+    for move in [
+        c.Move(c.Square.b1, c.Square.c3),
+        c.Move(c.Square.g8, c.Square.f6),
+        c.Move(c.Square.g1, c.Square.f3),
+    ]:
+        b2.make_move(move)
+
+    expected = cb.Board.from_fen(
+        "rnbqkb1r/pppppppp/5n2/8/8/2N2N2/PPPPPPPP/R1BQKB1R b KQkq - 3 2"
+    )
+    assert b1.zobrist_key == b2.zobrist_key == expected.zobrist_key
+
+    # Same placement, but different side to move / castling rights.
+    assert (
+        cb.Board.from_fen(
+            "rnbqkb1r/pppppppp/5n2/8/8/2N2N2/PPPPPPPP/R1BQKB1R w KQkq - 3 2"
+        ).zobrist_key
+        != expected.zobrist_key
+    )
+    assert (
+        cb.Board.from_fen(
+            "rnbqkb1r/pppppppp/5n2/8/8/2N2N2/PPPPPPPP/R1BQKB1R b Qkq - 3 2"
+        ).zobrist_key
+        != expected.zobrist_key
+    )
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w Kq - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 99 1000",
+    ],
+)
+def test_snapshots(fen: str) -> None:
+    b = cb.Board.from_fen(fen)
+    b.make_move(sorted(cm.generate_all_legal_moves(b), key=str)[0])
+
+    clone = b.clone()
+    assert clone == b
+    assert clone.zobrist_key == b.zobrist_key
+    assert_bitboards_match_state(clone)
+    # The clone is independent from the original, history included.
+    clone.unmake_move()
+    assert clone == cb.Board.from_fen(fen)
+    assert b != clone
+
+    expected_size = 38
+    data = b.to_bytes()
+    assert len(data) == expected_size
+    restored = cb.Board.from_bytes(data)
+    assert restored.zobrist_key == b.zobrist_key
+    # Snapshots do not include the move history.
+    b._previous_moves.clear()  # pyright: ignore[reportPrivateUsage]
+    assert restored == b
+    assert_bitboards_match_state(restored)
+
+
+def _tampered_snapshot(offset: int, value: bytes) -> bytes:
+    """Overwrite part of a valid snapshot (see `cb.Board.to_bytes` for the layout)."""
+
+    data = cb.Board.from_fen(
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    ).to_bytes()
+    return data[:offset] + value + data[offset + len(value) :]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        bytes(39),
+        bytes([0x77] * 32) + bytes(6),
+        # Castling rights beyond the 4 known ones.
+        _tampered_snapshot(32, bytes([0x20])),
+        # En passant square past h8.
+        _tampered_snapshot(33, bytes([65])),
+        # Fullmove number 0.
+        _tampered_snapshot(36, bytes(2)),
+    ],
+)
+def test_invalid_snapshots(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        cb.Board.from_bytes(data)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w Kq - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 99 1000",
+    ],
+)
+def test_fen_round_trip(fen: str) -> None:
+    b = cb.Board.from_fen(fen)
+    assert b.to_fen() == fen
+    assert cb.Board.from_fen(fen, trusted=True) == b
+
+    moves = sorted(cm.generate_all_legal_moves(b), key=str)[:5]
+    boards = []
+    for move in moves:
+        b.make_move(move)
+        boards.append(b.clone())
+        b.unmake_move()
+    for board, fen_after_move in zip(boards, cb.boards_to_fens(boards), strict=True):
+        board._previous_moves.clear()  # pyright: ignore[reportPrivateUsage]
+        assert cb.Board.from_fen(fen_after_move) == board
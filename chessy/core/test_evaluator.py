@@ -1,8 +1,14 @@
+import math
+import time
+from typing import Any
+
 import pytest
 
 import chessy.core as c
 import chessy.core.board as cb
 import chessy.core.evaluator as ce
+import chessy.core.timeman as ctm
+import chessy.core.transposition as ct
 
 
 @pytest.mark.parametrize(
@@ -52,3 +58,138 @@ def test_move_search(fen: str, expected_bestmove: c.Move) -> None:
     if bestmove != expected_bestmove:
         bestmove = ev.start_search(b, max_depth=2)
     assert bestmove == expected_bestmove
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "6k1/5ppp/8/8/8/8/5PPP/3R2K1 b - - 0 1",
+        "4k3/8/3n4/8/2B5/8/3P4/4K3 w - - 0 1",
+    ],
+)
+def test_search_matches_reference_minimax(fen: str) -> None:
+    # Reference mode asserts the alpha-beta root score equals plain minimax's.
+    ev = ce.Evaluator(reference_mode=True)
+    b = cb.Board.from_fen(fen)
+    assert ev.start_search(b, max_depth=2) is not None
+
+
+def test_aspiration_windows_match_reference_minimax(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Windows so narrow that most iterations fail low or high, and are searched again.
+    monkeypatch.setattr(ce, "_ASPIRATION_MIN_DEPTH", 2)
+    monkeypatch.setattr(ce, "_ASPIRATION_DELTA", 0.01)
+    ev = ce.Evaluator(reference_mode=True)
+    b = cb.Board.from_fen("4k3/8/3n4/8/2B5/8/3P4/4K3 w - - 0 1")
+    assert ev.start_search(b, max_depth=3) is not None
+
+
+def test_quiescence_avoids_losing_captures() -> None:
+    # At depth 1, Qxd5 looks like it wins a pawn unless the recapture is seen.
+    ev = ce.Evaluator()
+    b = cb.Board.from_fen("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1")
+    bestmove = ev.start_search(b, max_depth=1)
+    assert bestmove is not None
+    assert bestmove != c.Move(c.Square.d1, c.Square.d5)
+
+
+def test_quiescence_searches_check_evasions() -> None:
+    ev = ce.Evaluator()
+    # Fool's mate: standing pat would score it as a stalemate.
+    b = cb.Board.from_fen(
+        "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"
+    )
+    assert ev._quiesce(b, -math.inf, math.inf) == -math.inf  # pyright: ignore[reportPrivateUsage]
+    # The knight forks the king and the queen: none of the evasions is a capture, and
+    # all of them lose the queen.
+    b = cb.Board.from_fen("k7/8/8/8/8/4n3/6K1/3Q4 w - - 0 1")
+    assert ev._quiesce(b, -math.inf, math.inf) < 0  # pyright: ignore[reportPrivateUsage]
+
+
+def test_search_only_makes_legal_moves(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The search skips validation, so make sure it would have passed.
+    monkeypatch.setattr(cb.Board, "verify_legal_moves", True)
+    ev = ce.Evaluator()
+    b = cb.Board.from_fen(
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    )
+    assert ev.start_search(b, max_depth=2) is not None
+
+
+def test_search_node_limit() -> None:
+    ev = ce.Evaluator()
+    b = cb.Board.from_fen(
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    )
+    node_limit = 500
+    bestmove = ev.start_search(
+        b, max_depth=10, limits=ctm.SearchLimits(nodes=node_limit)
+    )
+    # Even if the first iteration did not complete, a move must be returned.
+    assert bestmove is not None
+    assert node_limit <= ev.nodes < node_limit + 50
+
+
+def test_stopped_search_stores_nothing(monkeypatch: pytest.MonkeyPatch) -> None:
+    ev = ce.Evaluator()
+    store = ct.TranspositionTable.store
+
+    def checked_store(table: ct.TranspositionTable, *args: Any) -> None:
+        # Scores found after the search was stopped are meaningless.
+        assert not ev._stop_search  # pyright: ignore[reportPrivateUsage]
+        store(table, *args)
+
+    monkeypatch.setattr(ct.TranspositionTable, "store", checked_store)
+    b = cb.Board.from_fen(
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    )
+    for node_limit in range(100, 1000, 37):
+        ev.start_search(b, max_depth=10, limits=ctm.SearchLimits(nodes=node_limit))
+
+
+def test_search_move_time() -> None:
+    ev = ce.Evaluator()
+    b = cb.Board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+    start = time.perf_counter()
+    bestmove = ev.start_search(b, max_depth=99, limits=ctm.SearchLimits(move_time=300))
+    assert bestmove is not None
+    assert time.perf_counter() - start < 1
+
+
+def test_clearing_search_state() -> None:
+    fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8"
+    ev = ce.Evaluator()
+    ev.start_search(cb.Board.from_fen(fen), max_depth=3)
+    nodes = ev.nodes
+
+    ev.clear_hash()
+    ev.clear_heuristics()
+    ev.start_search(cb.Board.from_fen(fen), max_depth=3)
+    # Nothing from the first search is left to change the move ordering.
+    assert ev.nodes == nodes
+
+
+class _InfoRecorder(ce.EvaluationInfoReporter):
+    def __init__(self) -> None:
+        self.infos: list[tuple[int, float, list[c.Move]]] = []
+
+    def report_info(
+        self, *, depth: int, best_evaluation: float, pv: list[c.Move]
+    ) -> None:
+        self.infos.append((depth, best_evaluation, pv))
+
+
+def test_pv_truncated_by_transposition_table() -> None:
+    fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8"
+    depth = 4
+    recorder = _InfoRecorder()
+    ev = ce.Evaluator(recorder)
+    ev.start_search(cb.Board.from_fen(fen), max_depth=depth)
+    _, evaluation, pv = recorder.infos[-1]
+    assert len(pv) == depth
+
+    # The PV nodes are now cut off by the table, but the reported PV is still whole.
+    ev.start_search(cb.Board.from_fen(fen), max_depth=depth)
+    assert recorder.infos[-1] == (depth, evaluation, pv)
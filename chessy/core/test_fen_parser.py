@@ -114,3 +114,57 @@ def test_fen_with_incorrect_en_passant_target(test_input: str) -> None:
 def test_wellformed_fen(test_input: str, expected_output: fp.FenParseResult) -> None:
     result = parse(test_input)
     assert result == expected_output
+    assert parse(test_input, trusted=True) == expected_output
+
+
+@pytest.mark.parametrize(
+    "test_input,expected_fen,expected_operations",
+    [
+        (
+            "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - "
+            'bm Bb5; id "a;b";',
+            "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 1",
+            {"bm": ["Bb5"], "id": ["a;b"]},
+        ),
+        (
+            '8/8/8/8/8/8/8/k7 b - e3 am Ka2 Kb1; c0 "two words"; hmvc 12; fmvn 34;',
+            "8/8/8/8/8/8/8/k7 b - e3 12 34",
+            {"am": ["Ka2", "Kb1"], "c0": ["two words"], "hmvc": ["12"], "fmvn": ["34"]},
+        ),
+        (
+            "8/8/8/8/8/8/8/k7 w - - 5 60 bm Kb2;",
+            "8/8/8/8/8/8/8/k7 w - - 5 60",
+            {"bm": ["Kb2"]},
+        ),
+        ("8/8/8/8/8/8/8/k7 w - -", "8/8/8/8/8/8/8/k7 w - - 0 1", {}),
+    ],
+)
+def test_epd(
+    test_input: str, expected_fen: str, expected_operations: dict[str, list[str]]
+) -> None:
+    position, operations = fp.parse_epd(test_input)
+    assert position == parse(expected_fen)
+    assert operations == expected_operations
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_load_epd(max_workers: int) -> None:
+    valid = "4k3/8/8/8/8/8/8/4K3 w - - bm Kd2;"
+    lines = [valid, "", "4k3/8/8/8/8/8/8/4K3 x - - bm Kd2;", valid + "\n"] * 5
+    records = list(fp.load_epd(lines, max_workers=max_workers, chunk_size=3))
+
+    expected_records = 15
+    assert len(records) == expected_records
+    for record in records:
+        if (record.line_number - 3) % 4 == 0:
+            assert isinstance(record, fp.EpdError)
+            assert "Color x is invalid" in record.message
+        else:
+            assert isinstance(record, fp.EpdRecord)
+            assert record.operations == {"bm": ["Kd2"]}
+            assert record.to_board().to_fen() == "4k3/8/8/8/8/8/8/4K3 w - - 0 1"
+    assert [record.line_number for record in records] == [
+        line_number
+        for line_number in range(1, 21)
+        if line_number % 4 != 2  # noqa: PLR2004
+    ]
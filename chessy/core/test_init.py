@@ -19,3 +19,13 @@ def test_move_from_long_algebraic_notation(test_input: str, expected: c.Move) ->
 def test_invalid_moves_from_long_algebraic_notation(test_input: str) -> None:
     with pytest.raises(ValueError):
         c.Move.from_long_algebraic_notation(test_input)
+
+
+def test_castling_availability_mask() -> None:
+    for mask in range(16):
+        assert c.CastlingAvailability.from_mask(mask).to_mask() == mask
+    white_kingside_and_black_queenside = 0b1001
+    assert (
+        c.CastlingAvailability(True, False, False, True).to_mask()
+        == white_kingside_and_black_queenside
+    )
@@ -0,0 +1,37 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.movegen as cm
+
+
+@pytest.mark.parametrize(
+    "move",
+    [
+        c.Move(c.Square.e2, c.Square.e4),
+        c.Move(c.Square.h8, c.Square.a1),
+        c.Move(c.Square.a7, c.Square.b8, promotion=c.Type.KNIGHT),
+        c.Move(c.Square.d2, c.Square.d1, promotion=c.Type.QUEEN),
+    ],
+)
+def test_round_trip(move: c.Move) -> None:
+    code = cmc.from_move(move)
+    assert 0 < code < 1 << 16
+    assert cmc.source(code) == move.source.value
+    assert cmc.target(code) == move.target.value
+    assert cmc.promotion(code) == move.promotion
+    assert cmc.promotion_ptype_value(code) == (
+        0 if move.promotion is None else move.promotion.value
+    )
+    assert cmc.to_move(code) == move
+    # Decoding does not build new objects.
+    assert cmc.to_move(code) is cmc.to_move(code)
+
+
+def test_codes_are_unique() -> None:
+    b = cb.Board.from_fen("n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1")
+    moves = cm.generate_all_legal_moves(b)
+    codes = {cmc.from_move(move) for move in moves}
+    assert len(codes) == len(moves)
+    assert codes == set(cm.generate_all_legal_move_codes(b))
@@ -134,6 +134,36 @@ import chessy.core.movegen as cm
                 c.Move(c.Square.f4, c.Square.f3),
             },
         ),
+        (
+            # En passant would expose the king along the rank.
+            "8/8/8/KPp4r/8/8/8/7k w - c6 0 1",
+            {
+                c.Move(c.Square.a5, c.Square.a4),
+                c.Move(c.Square.a5, c.Square.a6),
+                c.Move(c.Square.a5, c.Square.b6),
+                c.Move(c.Square.b5, c.Square.b6),
+            },
+        ),
+        (
+            # The knight is pinned and the bishop can only move along its pin.
+            "4r1k1/8/8/q7/8/8/3BN3/4K3 w - - 0 1",
+            {
+                c.Move(c.Square.d2, c.Square.c3),
+                c.Move(c.Square.d2, c.Square.b4),
+                c.Move(c.Square.d2, c.Square.a5),
+                c.Move(c.Square.e1, c.Square.d1),
+                c.Move(c.Square.e1, c.Square.f1),
+                c.Move(c.Square.e1, c.Square.f2),
+            },
+        ),
+        (
+            # Double check, only the king can move.
+            "4k3/8/8/8/7b/5n2/3PP3/2Q1K3 w - - 0 1",
+            {
+                c.Move(c.Square.e1, c.Square.d1),
+                c.Move(c.Square.e1, c.Square.f1),
+            },
+        ),
     ],
 )
 def test_moves(initial_fen: str, expected_moves: set[c.Move]) -> None:
@@ -160,3 +190,48 @@ def test_impossible_castling_positions(initial_fen: str) -> None:
     assert c.Move(c.Square.e1, c.Square.c1) not in moves
     assert c.Move(c.Square.e8, c.Square.g8) not in moves
     assert c.Move(c.Square.e8, c.Square.c8) not in moves
+
+
+@pytest.mark.parametrize(
+    "initial_fen",
+    [
+        "4k2r/r2Nn3/7p/8/1Pp5/B5p1/4Q2P/R3K2R b KQk b3 0 1",
+        "4k2r/r2Nn3/7p/8/1Pp5/B5p1/4Q2P/R3K2R w KQk b3 0 1",
+        "6nk/5Pp1/6K1/8/8/8/8/8 w - - 0 1",
+        "4k3/8/8/8/3PPp2/8/5P2/5K2 b - e3 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        # Pinned pieces cannot capture.
+        "4k3/4r3/8/3p4/4B3/8/8/4K3 w - - 0 1",
+    ],
+)
+def test_legal_captures(initial_fen: str) -> None:
+    b = cb.Board.from_fen(initial_fen)
+    expected = {
+        move
+        for move in cm.generate_all_legal_moves(b)
+        if b.get_piece_by_square(move.target) is not None
+        or move.promotion is not None
+        or (
+            move.target == b.en_passant_target
+            and (p := b.get_piece_by_square(move.source)) is not None
+            and p.ptype == c.Type.PAWN
+        )
+    }
+    assert cm.generate_legal_captures(b) == expected
+
+
+@pytest.mark.parametrize(
+    "initial_fen",
+    [
+        "4k2r/r2Nn3/7p/8/1Pp5/B5p1/4Q2P/R3K2R b KQk b3 0 1",
+        "4k2r/r2Nn3/7p/8/1Pp5/B5p1/4Q2P/R3K2R w KQk b3 0 1",
+        "6nk/5Pp1/6K1/8/8/8/8/8 w - - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    ],
+)
+def test_quiet_moves_complement_captures(initial_fen: str) -> None:
+    b = cb.Board.from_fen(initial_fen)
+    quiets = cm.generate_legal_quiet_moves(b)
+    captures = cm.generate_legal_captures(b)
+    assert not quiets & captures
+    assert quiets | captures == cm.generate_all_legal_moves(b)
@@ -0,0 +1,56 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.movegen as cm
+import chessy.core.movepick as cmp
+
+# White can win a pawn with exd5, lose the queen with Qxd5, and has many quiet moves.
+_fen = "4k3/5p2/4p3/3p4/4P3/8/3Q4/4K3 w - - 0 1"
+
+
+def test_each_legal_move_once() -> None:
+    b = cb.Board.from_fen(_fen)
+    moves = list(cmp.staged_moves(b))
+    assert len(moves) == len(set(moves))
+    assert set(moves) == set(cm.generate_all_legal_move_codes(b))
+
+
+def test_stage_order() -> None:
+    b = cb.Board.from_fen(_fen)
+    hash_move = cmc.from_move(c.Move(c.Square.d2, c.Square.d3))
+    killer = cmc.from_move(c.Move(c.Square.d2, c.Square.h6))
+    counter_move = cmc.from_move(c.Move(c.Square.e1, c.Square.d1))
+    best_history = cmc.from_move(c.Move(c.Square.e1, c.Square.f1))
+
+    def history(move: int) -> int:
+        return 1 if move == best_history else 0
+
+    moves = list(cmp.staged_moves(b, hash_move, [killer], history, counter_move))
+    assert moves[:5] == [
+        hash_move,
+        cmc.from_move(c.Move(c.Square.e4, c.Square.d5)),
+        killer,
+        counter_move,
+        best_history,
+    ]
+    assert moves[-1] == cmc.from_move(c.Move(c.Square.d2, c.Square.d5))
+
+
+def test_illegal_hash_move_and_killers_are_ignored() -> None:
+    b = cb.Board.from_fen(_fen)
+    illegal = cmc.from_move(c.Move(c.Square.d2, c.Square.d8))
+    moves = list(cmp.staged_moves(b, illegal, [illegal], counter_move=illegal))
+    assert illegal not in moves
+    assert set(moves) == set(cm.generate_all_legal_move_codes(b))
+
+
+def test_later_stages_are_lazy(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(_: cb.Board) -> list[int]:
+        raise AssertionError("Quiet moves should not have been generated")
+
+    monkeypatch.setattr(cm, "generate_legal_quiet_move_codes", fail)
+    b = cb.Board.from_fen(_fen)
+    moves = cmp.staged_moves(b)
+    assert next(moves) == cmc.from_move(c.Move(c.Square.e4, c.Square.d5))
@@ -0,0 +1,45 @@
+import pytest
+
+import chessy.core.board as cb
+import chessy.core.perft as cp
+
+# Deeper counts are checked by `perft --suite`, but they take too long for tests.
+_max_tested_nodes = 3000
+
+
+@pytest.mark.parametrize(
+    "fen,depth,expected",
+    [
+        (position.fen, depth, expected)
+        for position in cp.STANDARD_POSITIONS
+        for depth, expected in enumerate(position.expected_nodes, start=1)
+        if expected <= _max_tested_nodes
+    ],
+)
+def test_standard_positions(fen: str, depth: int, expected: int) -> None:
+    b = cb.Board.from_fen(fen)
+    assert cp.perft(b, depth) == expected
+    # The board must be left untouched.
+    assert b == cb.Board.from_fen(fen)
+
+
+def test_divide() -> None:
+    position = cp.STANDARD_POSITIONS[0]
+    b = cb.Board.from_fen(position.fen)
+    report = cp.timed_divide(b, 2)
+    assert len(report.divide) == position.expected_nodes[0]
+    assert all(nodes == position.expected_nodes[0] for nodes in report.divide.values())
+    assert report.nodes == position.expected_nodes[1]
+
+    with pytest.raises(ValueError):
+        cp.divide(b, 0)
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_parallel_divide(depth: int) -> None:
+    # Position 3 has few enough nodes to be quick even at depth 3.
+    fen = cp.STANDARD_POSITIONS[2].fen
+    b = cb.Board.from_fen(fen)
+    with cp.create_executor(2) as executor:
+        assert cp.parallel_divide(b, depth, executor) == cp.divide(b, depth)
+    assert b == cb.Board.from_fen(fen)
@@ -0,0 +1,70 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.pgn as cpg
+
+_pgn = """\
+[Event "Casual \\"blitz\\" game"]
+[Site "?"]
+[Result "1-0"]
+
+1. e4 {King's pawn; the most
+popular first move} e5 2. Nf3 $1 Nc6 (2... d6 3. d4 {Philidor} (3. Bc4)) 3. Bb5 a6
+; Trying to win the bishop pair.
+% Escaped line.
+4.Bxc6 dxc6!? 1-0
+
+[Event "No result, with a custom start"]
+[SetUp "1"]
+[FEN "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1"]
+
+1. O-O Kd7 2. Ra7+
+
+[Event "Illegal"]
+
+1. e4 e5 2. Ke3 *
+"""
+
+
+def test_read_games() -> None:
+    games = list(cpg.read_games(_pgn.splitlines(keepends=True)))
+    expected_games = 3
+    assert len(games) == expected_games
+
+    assert games[0].tags == {
+        "Event": 'Casual "blitz" game',
+        "Site": "?",
+        "Result": "1-0",
+    }
+    assert games[0].moves == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Bxc6", "dxc6!?"]
+    assert games[0].result == "1-0"
+
+    assert games[1].moves == ["O-O", "Kd7", "Ra7+"]
+    assert games[1].result == "*"
+    assert games[2].moves == ["e4", "e5", "Ke3"]
+
+
+def test_replay() -> None:
+    game = next(cpg.read_games(_pgn.splitlines()))
+    replayed = [(board.fullmove_number, move) for board, move in game.replay()]
+    assert replayed[2] == (2, c.Move(c.Square.g1, c.Square.f3))
+    assert replayed[-1] == (4, c.Move(c.Square.d7, c.Square.c6))
+
+    board = game.initial_board()
+    for _, move in replayed:
+        board.make_move(move)
+    assert board.to_fen() == (
+        "r1bqkbnr/1pp2ppp/p1p5/4p3/4P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 0 5"
+    )
+
+
+def test_replay_from_fen() -> None:
+    game = list(cpg.read_games(_pgn.splitlines()))[1]
+    moves = [move for _, move in game.replay()]
+    assert moves[0] == c.Move(c.Square.e1, c.Square.g1)
+
+
+def test_replay_illegal_move() -> None:
+    game = list(cpg.read_games(_pgn.splitlines()))[2]
+    with pytest.raises(cpg.PgnError, match="Move 2"):
+        list(game.replay())
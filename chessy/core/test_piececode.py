@@ -0,0 +1,22 @@
+import chessy.core as c
+import chessy.core.piececode as cpc
+
+
+def test_round_trip() -> None:
+    codes = set()
+    for color in c.Color:
+        for ptype in c.Type:
+            piece = c.Piece(ptype, color)
+            code = cpc.from_piece(piece)
+            assert cpc.EMPTY < code < cpc.LIMIT
+            assert cpc.ptype_value(code) == ptype.value
+            assert cpc.to_type(code) == ptype
+            assert cpc.COLORS[cpc.color_of(code)] == color
+            assert cpc.to_piece(code) == piece
+            # Decoding does not build new objects.
+            assert cpc.to_piece(code) is cpc.to_piece(code)
+            codes.add(code)
+
+    assert len(codes) == len(c.Color) * len(c.Type)
+    assert cpc.from_piece(None) == cpc.EMPTY
+    assert cpc.to_piece(cpc.EMPTY) is None
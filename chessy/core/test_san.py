@@ -0,0 +1,104 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.board as cb
+import chessy.core.san as csan
+
+
+@pytest.mark.parametrize(
+    "fen,san,expected",
+    [
+        (
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "Nf3",
+            c.Move(c.Square.g1, c.Square.f3),
+        ),
+        (
+            "rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+            "exd5",
+            c.Move(c.Square.e4, c.Square.d5),
+        ),
+        (
+            # Disambiguation by file, by rank and by both.
+            "4k3/8/8/8/8/8/4K3/R6R w - - 0 1",
+            "Rad1",
+            c.Move(c.Square.a1, c.Square.d1),
+        ),
+        (
+            "4k3/R7/8/8/8/8/8/R3K3 w - - 0 1",
+            "R1a4",
+            c.Move(c.Square.a1, c.Square.a4),
+        ),
+        (
+            "4k3/8/8/8/8/2Q1Q3/8/2Q1K3 w - - 0 1",
+            "Qc3d2",
+            c.Move(c.Square.c3, c.Square.d2),
+        ),
+        (
+            # Redundant disambiguation and annotations.
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "Ng1f3!?",
+            c.Move(c.Square.g1, c.Square.f3),
+        ),
+        (
+            "r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1",
+            "O-O-O+",
+            c.Move(c.Square.e8, c.Square.c8),
+        ),
+        (
+            "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+            "0-0",
+            c.Move(c.Square.e1, c.Square.g1),
+        ),
+        (
+            "1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1",
+            "axb8=N",
+            c.Move(c.Square.a7, c.Square.b8, c.Type.KNIGHT),
+        ),
+        (
+            "1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1",
+            "a8Q#",
+            c.Move(c.Square.a7, c.Square.a8, c.Type.QUEEN),
+        ),
+        (
+            "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1",
+            "exd6 e.p.",
+            c.Move(c.Square.e5, c.Square.d6),
+        ),
+    ],
+)
+def test_parse(fen: str, san: str, expected: c.Move) -> None:
+    assert csan.parse(cb.Board.from_fen(fen), san) == expected
+
+
+@pytest.mark.parametrize(
+    "fen,san,error",
+    [
+        (
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "Pe9",
+            csan.InvalidSanError,
+        ),
+        (
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "Nd2",
+            csan.IllegalSanError,
+        ),
+        (
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "O-O",
+            csan.IllegalSanError,
+        ),
+        (
+            # The rook on e1 could go to g1, but that is not castling.
+            "4k3/8/8/8/8/8/8/4R1K1 w - - 0 1",
+            "O-O",
+            csan.IllegalSanError,
+        ),
+        ("4k3/8/8/8/8/8/4K3/R6R w - - 0 1", "Rd1", csan.AmbiguousSanError),
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", "axb8", csan.IllegalSanError),
+    ],
+)
+def test_parse_errors(fen: str, san: str, error: type[csan.SanError]) -> None:
+    with pytest.raises(error):
+        csan.parse(cb.Board.from_fen(fen), san)
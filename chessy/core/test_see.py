@@ -0,0 +1,64 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.board as cb
+import chessy.core.movecode as cmc
+import chessy.core.see as cs
+
+
+@pytest.mark.parametrize(
+    "fen,move,expected",
+    [
+        (
+            # Undefended pawn.
+            "4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1",
+            c.Move(c.Square.e4, c.Square.d5),
+            1,
+        ),
+        (
+            # Queen takes a pawn defended by another pawn.
+            "4k3/2p5/3p4/8/8/8/3Q4/4K3 w - - 0 1",
+            c.Move(c.Square.d2, c.Square.d6),
+            -8,
+        ),
+        (
+            # Rook trade.
+            "3rk3/8/3r4/8/8/3R4/8/4K3 w - - 0 1",
+            c.Move(c.Square.d3, c.Square.d6),
+            0,
+        ),
+        (
+            # Same, but with a second rook behind the first one (x-ray).
+            "3rk3/8/3r4/8/8/3R4/3R4/4K3 w - - 0 1",
+            c.Move(c.Square.d3, c.Square.d6),
+            5,
+        ),
+        (
+            # The king can recapture...
+            "8/8/8/3pk3/8/8/8/3QK3 w - - 0 1",
+            c.Move(c.Square.d1, c.Square.d5),
+            -8,
+        ),
+        (
+            # ... unless the square is defended.
+            "3R4/8/8/3pk3/8/8/8/3QK3 w - - 0 1",
+            c.Move(c.Square.d1, c.Square.d5),
+            1,
+        ),
+        (
+            # En passant.
+            "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1",
+            c.Move(c.Square.e5, c.Square.d6),
+            1,
+        ),
+        (
+            # Quiet promotion, then recaptured.
+            "3r1k2/4P3/8/8/8/8/8/4K3 w - - 0 1",
+            c.Move(c.Square.e7, c.Square.e8, promotion=c.Type.QUEEN),
+            -1,
+        ),
+    ],
+)
+def test_static_exchange_evaluation(fen: str, move: c.Move, expected: float) -> None:
+    b = cb.Board.from_fen(fen)
+    assert cs.static_exchange_evaluation(b, cmc.from_move(move)) == expected
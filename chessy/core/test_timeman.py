@@ -0,0 +1,56 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.timeman as ctm
+
+
+def test_allocate_move_time() -> None:
+    deadlines = ctm.allocate(ctm.SearchLimits(move_time=1000), c.Color.WHITE)
+    assert deadlines.soft == deadlines.hard
+    assert deadlines.hard is not None
+    assert 0.9 < deadlines.hard < 1  # noqa: PLR2004
+
+
+def test_allocate_without_limits() -> None:
+    deadlines = ctm.allocate(ctm.SearchLimits(nodes=1000), c.Color.WHITE)
+    assert deadlines == ctm.Deadlines(None, None)
+
+
+@pytest.mark.parametrize("color", [c.Color.WHITE, c.Color.BLACK])
+def test_allocate_uses_own_clock(color: c.Color) -> None:
+    limits = ctm.SearchLimits(white_time=60_000, black_time=6_000)
+    deadlines = ctm.allocate(limits, color)
+    assert deadlines.soft is not None
+    assert deadlines.hard is not None
+    assert deadlines.soft <= deadlines.hard
+    remaining = 60 if color == c.Color.WHITE else 6
+    assert deadlines.hard <= remaining / 2
+    assert deadlines.soft == pytest.approx((remaining - 0.05) / 30)
+
+
+def test_allocate_increment_and_moves_to_go() -> None:
+    base = ctm.allocate(ctm.SearchLimits(white_time=60_000), c.Color.WHITE)
+    with_increment = ctm.allocate(
+        ctm.SearchLimits(white_time=60_000, white_increment=2_000), c.Color.WHITE
+    )
+    last_move = ctm.allocate(
+        ctm.SearchLimits(white_time=60_000, moves_to_go=1), c.Color.WHITE
+    )
+    assert base.soft is not None
+    assert with_increment.soft is not None
+    assert last_move.soft is not None
+    assert base.soft < with_increment.soft
+    assert base.soft < last_move.soft
+    # Even with a single move to go, part of the clock is kept.
+    assert last_move.hard is not None
+    assert last_move.hard < 60  # noqa: PLR2004
+
+
+def test_node_limit() -> None:
+    time_manager = ctm.TimeManager()
+    time_manager.start(ctm.SearchLimits(nodes=300), c.Color.WHITE)
+    assert time_manager.next_check(0) == time_manager.check_interval
+    assert time_manager.next_check(200) == 300  # noqa: PLR2004
+    assert not time_manager.is_past_hard_limit(299)
+    assert time_manager.is_past_hard_limit(300)
+    assert time_manager.can_start_iteration(0)
@@ -0,0 +1,74 @@
+import pytest
+
+import chessy.core as c
+import chessy.core.movecode as cmc
+import chessy.core.transposition as ct
+
+_move = cmc.from_move(c.Move(c.Square.e2, c.Square.e4))
+_other_move = cmc.from_move(c.Move(c.Square.d2, c.Square.d4))
+
+
+def test_store_and_probe() -> None:
+    tt = ct.TranspositionTable(1)
+    assert tt.probe(42) is None
+
+    tt.store(42, 3, 1.5, ct.Bound.EXACT, _move)
+    entry = tt.probe(42)
+    assert entry is not None
+    assert (entry.depth, entry.score, entry.bound, entry.best_move) == (
+        3,
+        1.5,
+        ct.Bound.EXACT,
+        _move,
+    )
+
+    # Same slot, different key.
+    assert tt.probe(42 + len(tt)) is None
+
+
+def test_depth_preferred_replacement() -> None:
+    tt = ct.TranspositionTable(1)
+    colliding_key = 42 + len(tt)
+
+    tt.store(42, 5, 1.0, ct.Bound.EXACT, _move)
+    tt.store(colliding_key, 2, 0.0, ct.Bound.EXACT, _other_move)
+    assert tt.probe(42) is not None
+    assert tt.probe(colliding_key) is None
+
+    tt.store(colliding_key, 5, 0.0, ct.Bound.EXACT, _other_move)
+    assert tt.probe(42) is None
+    assert tt.probe(colliding_key) is not None
+
+
+def test_entries_from_older_searches_are_replaceable() -> None:
+    tt = ct.TranspositionTable(1)
+    colliding_key = 42 + len(tt)
+
+    tt.store(42, 8, 1.0, ct.Bound.EXACT, _move)
+    tt.new_search()
+    # Still readable...
+    assert tt.probe(42) is not None
+    # ... but no longer protected by its depth.
+    tt.store(colliding_key, 1, 0.0, ct.Bound.EXACT, _other_move)
+    assert tt.probe(colliding_key) is not None
+
+
+def test_same_position_keeps_best_move() -> None:
+    tt = ct.TranspositionTable(1)
+    tt.store(42, 1, 1.0, ct.Bound.EXACT, _move)
+    tt.store(42, 2, 0.5, ct.Bound.UPPER, None)
+    entry = tt.probe(42)
+    assert entry is not None
+    assert entry.best_move == _move
+    assert entry.depth == 2  # noqa: PLR2004
+
+
+def test_size() -> None:
+    small = ct.TranspositionTable(1)
+    big = ct.TranspositionTable(4)
+    assert 4 * len(small) <= len(big) < 4 * (len(small) + 1)
+
+    with pytest.raises(ValueError):
+        small.resize(0)
+    with pytest.raises(ValueError):
+        small.resize(ct.MAX_SIZE_MB + 1)
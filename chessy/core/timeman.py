@@ -0,0 +1,140 @@
+"""
+Time management: deciding how long to search, given the limits of a UCI `go` command
+(clocks, a fixed time per move, a node budget...).
+
+Every search gets two deadlines. The soft one is the time it should ideally take: no
+new iteration of iterative deepening is started past it. The hard one is the most it
+may take: the search is stopped there, even in the middle of an iteration.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import chessy.core as c
+
+# Kept from every budget, for the time it takes to send the move (e.g. over the
+# network, for online play).
+_move_overhead = 0.05
+# Assumed number of moves left in the game when `movestogo` is not known.
+_default_moves_to_go = 30
+# A search may take up to this many times its share of the clock, when the soft
+# deadline was not enough to finish an iteration...
+_hard_deadline_factor = 4
+# ... but never more than this fraction of the remaining time.
+_max_clock_fraction = 0.5
+# Expected ratio between the times of two consecutive iterations.
+_branching_factor = 3.0
+
+
+@dataclass(frozen=True, slots=True)
+class SearchLimits:
+    """
+    The limits of a search, as given by UCI's `go`. Times are in milliseconds, and
+    unknown values are None.
+    """
+
+    white_time: int | None = None
+    black_time: int | None = None
+    white_increment: int = 0
+    black_increment: int = 0
+    moves_to_go: int | None = None
+    move_time: int | None = None
+    nodes: int | None = None
+
+    def is_limited(self) -> bool:
+        return (
+            self.white_time is not None
+            or self.black_time is not None
+            or self.move_time is not None
+            or self.nodes is not None
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Deadlines:
+    # In seconds since the search started, or None if there is no limit.
+    soft: float | None
+    hard: float | None
+
+
+def allocate(limits: SearchLimits, color: c.Color) -> Deadlines:
+    """Decide how long the side of color `color` may search under `limits`."""
+
+    if limits.move_time is not None:
+        budget = max(limits.move_time / 1000 - _move_overhead, 0)
+        return Deadlines(budget, budget)
+
+    if color == c.Color.WHITE:
+        remaining, increment = limits.white_time, limits.white_increment
+    else:
+        remaining, increment = limits.black_time, limits.black_increment
+    if remaining is None:
+        return Deadlines(None, None)
+
+    remaining_seconds = max(remaining / 1000 - _move_overhead, 0)
+    moves_to_go = limits.moves_to_go or _default_moves_to_go
+    soft = remaining_seconds / moves_to_go + increment / 1000 * 3 / 4
+    hard = min(soft * _hard_deadline_factor, remaining_seconds * _max_clock_fraction)
+    return Deadlines(min(soft, hard), hard)
+
+
+class TimeManager:
+    """
+    Keeps track of the limits of the ongoing search. Reading the clock is much more
+    expensive than visiting a node, so the search only asks `is_past_hard_limit`
+    every `check_interval` nodes or so (see `next_check`).
+    """
+
+    check_interval = 256
+
+    _limits: SearchLimits
+    _deadlines: Deadlines
+    _start: float
+
+    def __init__(self) -> None:
+        self.start(SearchLimits(), c.Color.WHITE)
+
+    def start(self, limits: SearchLimits, color: c.Color) -> None:
+        self._limits = limits
+        self._deadlines = allocate(limits, color)
+        self._start = time.perf_counter()
+
+    @property
+    def deadlines(self) -> Deadlines:
+        return self._deadlines
+
+    def elapsed(self) -> float:
+        """Get the seconds since the search started."""
+        return time.perf_counter() - self._start
+
+    def next_check(self, nodes: int) -> int:
+        """Get the node count at which the limits should be checked again."""
+
+        next_check = nodes + self.check_interval
+        if self._limits.nodes is not None:
+            next_check = min(next_check, self._limits.nodes)
+        return next_check
+
+    def is_past_hard_limit(self, nodes: int) -> bool:
+        """Whether the search must stop right away, after visiting `nodes` nodes."""
+
+        if self._limits.nodes is not None and nodes >= self._limits.nodes:
+            return True
+        hard = self._deadlines.hard
+        return hard is not None and self.elapsed() >= hard
+
+    def can_start_iteration(self, last_iteration_seconds: float) -> bool:
+        """
+        Whether a new iteration of iterative deepening is worth starting, given how
+        long the last one took. An iteration that would be stopped by the hard
+        deadline anyway is wasted time.
+        """
+
+        elapsed = self.elapsed()
+        soft, hard = self._deadlines.soft, self._deadlines.hard
+        if soft is not None and elapsed >= soft:
+            return False
+        predicted_end = elapsed + last_iteration_seconds * _branching_factor
+        return hard is None or predicted_end < hard
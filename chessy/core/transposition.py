@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum, auto
+
+DEFAULT_SIZE_MB = 16
+MIN_SIZE_MB = 1
+MAX_SIZE_MB = 1024
+
+# Rough memory footprint of one stored entry, accounting for the entry itself, the
+# objects it references and its slot in the table.
+_ENTRY_SIZE_BYTES = 160
+_GENERATION_CYCLE = 256
+
+
+class Bound(Enum):
+    EXACT = auto()
+    # The real score is at least `score` (the search failed high).
+    LOWER = auto()
+    # The real score is at most `score` (the search failed low).
+    UPPER = auto()
+
+
+@dataclass(frozen=True, slots=True)
+class TranspositionEntry:
+    key: int
+    depth: int
+    score: float
+    bound: Bound
+    # Encoded as in `cmc`.
+    best_move: int | None
+    generation: int
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results, indexed by Zobrist keys.
+
+    Each key maps to a single slot. A new result replaces the stored one if it is
+    about the same position, if the stored one comes from an older search (see
+    `new_search`), or if it was searched at least as deep.
+    """
+
+    _entries: list[TranspositionEntry | None]
+    _generation: int
+
+    def __init__(self, size_mb: int = DEFAULT_SIZE_MB) -> None:
+        self._generation = 0
+        self.resize(size_mb)
+
+    def resize(self, size_mb: int) -> None:
+        """
+        Resize the table to take approximately `size_mb` megabytes. This clears all
+        stored entries.
+
+        ValueError is raised if `size_mb` is outside [MIN_SIZE_MB, MAX_SIZE_MB].
+        """
+
+        if not MIN_SIZE_MB <= size_mb <= MAX_SIZE_MB:
+            raise ValueError(
+                f"Table size must be between {MIN_SIZE_MB} and {MAX_SIZE_MB} MB, "
+                f"got {size_mb}"
+            )
+
+        nentries = size_mb * 1024 * 1024 // _ENTRY_SIZE_BYTES
+        self._entries = [None] * nentries
+
+    def clear(self) -> None:
+        self._entries = [None] * len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def new_search(self) -> None:
+        """
+        Mark the start of a new search. Entries stored by previous searches are kept
+        and can still be probed, but any new result is allowed to replace them.
+        """
+
+        self._generation = (self._generation + 1) % _GENERATION_CYCLE
+
+    def probe(self, key: int) -> TranspositionEntry | None:
+        entry = self._entries[key % len(self._entries)]
+        if entry is None or entry.key != key:
+            return None
+        return entry
+
+    def store(  # noqa: PLR0913
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        bound: Bound,
+        best_move: int | None,
+    ) -> None:
+        index = key % len(self._entries)
+        current = self._entries[index]
+
+        if current is not None:
+            is_same_position = current.key == key
+            if not (
+                is_same_position
+                or current.generation != self._generation
+                or depth >= current.depth
+            ):
+                return
+
+            if is_same_position and best_move is None:
+                # Do not lose the move of a previous search of this position.
+                best_move = current.best_move
+
+        self._entries[index] = TranspositionEntry(
+            key, depth, score, bound, best_move, self._generation
+        )
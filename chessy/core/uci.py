@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import sys
+from collections.abc import Iterator
 from dataclasses import dataclass
 from enum import Enum, auto
 from threading import Thread
@@ -13,6 +14,9 @@ import chessy.core.atkgen as ca
 import chessy.core.board as cb
 import chessy.core.evaluator as ce
 import chessy.core.fen_parser as fp
+import chessy.core.perft as cp
+import chessy.core.timeman as ctm
+import chessy.core.transposition as ct
 import chessy.utils as ut
 
 logger = logging.getLogger(__name__)
@@ -54,12 +58,23 @@ class _Position(_UserCommand):
 class _GoMode(Enum):
     INFINITE = auto()
     BY_DEPTH = auto()
+    PERFT = auto()
+    # Clocks, time per move or nodes, optionally with a depth.
+    BY_LIMITS = auto()
 
 
 @dataclass
 class _Go(_UserCommand):
     mode: _GoMode
-    depth: int  # Only meaningful if `mode` is `BY_DEPTH`.
+    # Only meaningful if `mode` is `BY_DEPTH` or `PERFT`, or `BY_LIMITS` if positive.
+    depth: int
+    limits: ctm.SearchLimits
+
+
+@dataclass
+class _SetOption(_UserCommand):
+    name: str
+    value: str | None
 
 
 class _Stop(_UserCommand):
@@ -79,6 +94,14 @@ class _Id(_EngineCommand):
     author: str
 
 
+@dataclass
+class _SpinOption(_EngineCommand):
+    name: str
+    default: int
+    min: int
+    max: int
+
+
 class _UciOk(_EngineCommand):
     pass
 
@@ -92,14 +115,30 @@ class _BestMove(_EngineCommand):
     move: c.Move
 
 
+@dataclass
+class _PerftResult(_EngineCommand):
+    report: cp.PerftReport
+
+
 @dataclass
 class _Info(_EngineCommand):
     depth: int
-    cp: int
+    centipawns: int
     pv: list[c.Move]
 
 
-_initial_position_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# Used when searching without a depth limit.
+_max_search_depth = 99
+# Maps the `go` arguments that are search limits to `ctm.SearchLimits` fields.
+_go_limit_args = {
+    "wtime": "white_time",
+    "btime": "black_time",
+    "winc": "white_increment",
+    "binc": "black_increment",
+    "movestogo": "moves_to_go",
+    "movetime": "move_time",
+    "nodes": "nodes",
+}
 
 
 @dataclass(frozen=True, slots=True)
@@ -114,13 +153,13 @@ class _UciEvaluationInfoReporter(ce.EvaluationInfoReporter):
         pv: list[c.Move],
     ) -> None:
         if best_evaluation == float("-inf"):
-            cp = -100
+            centipawns = -100
         elif best_evaluation == float("inf"):
-            cp = 100
+            centipawns = 100
         else:
-            cp = int(best_evaluation * 100)
+            centipawns = int(best_evaluation * 100)
         self._uci_engine._send_engine_command(  # pyright: ignore[reportPrivateUsage]
-            _Info(depth, cp, pv)
+            _Info(depth, centipawns, pv)
         )
 
 
@@ -130,7 +169,7 @@ class UciEngine:
     _engine_thread: Thread | None
 
     def __init__(self) -> None:
-        self._board = cb.Board.from_fen(_initial_position_fen)
+        self._board = cb.Board.from_fen(cb.INITIAL_POSITION_FEN)
         info_reporter = _UciEvaluationInfoReporter(self)
         self._evaluator = ce.Evaluator(info_reporter)
         self._engine_thread = None
@@ -153,7 +192,7 @@ class UciEngine:
 
             self._handle_user_command(command)
 
-    def _handle_user_command(self, command: _UserCommand) -> None:
+    def _handle_user_command(self, command: _UserCommand) -> None:  # noqa: PLR0915
         match command:
             case _Uci():
                 self._send_engine_command(
@@ -162,6 +201,11 @@ class UciEngine:
                         chessy.__author__,
                     )
                 )
+                self._send_engine_command(
+                    _SpinOption(
+                        "Hash", ct.DEFAULT_SIZE_MB, ct.MIN_SIZE_MB, ct.MAX_SIZE_MB
+                    )
+                )
                 self._send_engine_command(_UciOk())
 
             case _IsReady():
@@ -177,7 +221,12 @@ class UciEngine:
                 # command, it can be presumed they want to restart the game (even though
                 # they should've sent a position command in between).
                 logger.info("Resetting board to initial position")
-                self._board = cb.Board.from_fen(_initial_position_fen)
+                self._board = cb.Board.from_fen(cb.INITIAL_POSITION_FEN)
+                self._evaluator.clear_hash()
+                self._evaluator.clear_heuristics()
+
+            case _SetOption(name, value):
+                self._set_option(name, value)
 
             case _Position(fen, moves):
                 self._reset_engine_params()
@@ -204,16 +253,22 @@ class UciEngine:
                     self._board.make_ascii_repr(),
                 )
 
-            case _Go(mode, depth):
+            case _Go(mode, depth, limits):
                 if self._engine_thread is not None and self._engine_thread.is_alive():
                     logger.info(
                         "Unable to start new go command - thread is already busy"
                     )
                     return
 
-                def base_think(depth: int) -> None:
+                # The engine thread works on its own copy, so that a `position`
+                # command arriving meanwhile cannot change the board under it.
+                board = self._board.clone()
+
+                def base_think(
+                    depth: int, limits: ctm.SearchLimits | None = None
+                ) -> None:
                     bestmove = self._evaluator.start_search(
-                        self._board, max_depth=depth
+                        board, max_depth=depth, limits=limits
                     )
                     logger.info(
                         "Search of depth %d returned - reporting bestmove %s",
@@ -234,7 +289,7 @@ class UciEngine:
                         logger.info("Starting infinite calc")
 
                         def think() -> None:
-                            base_think(99)
+                            base_think(_max_search_depth)
 
                     case _GoMode.BY_DEPTH:
                         if depth < 1:
@@ -248,6 +303,25 @@ class UciEngine:
                         def think() -> None:
                             base_think(depth)
 
+                    case _GoMode.BY_LIMITS:
+                        logger.info("Starting calc with limits %s", limits)
+
+                        def think() -> None:
+                            base_think(
+                                depth if depth > 0 else _max_search_depth, limits
+                            )
+
+                    case _GoMode.PERFT:
+                        if depth < 1:
+                            logger.error("A depth of %d was sent for a perft", depth)
+                            return None
+                        logger.info("Starting perft with depth %d", depth)
+
+                        def think() -> None:
+                            report = cp.timed_divide(board, depth)
+                            self._send_engine_command(_PerftResult(report))
+                            self._reset_engine_params()
+
                 self._engine_thread = Thread(target=think)
                 self._engine_thread.start()
 
@@ -262,6 +336,21 @@ class UciEngine:
             case _:
                 ut.unreachable()
 
+    def _set_option(self, name: str, value: str | None) -> None:
+        # Option names are case-insensitive.
+        match name.lower():
+            case "hash":
+                try:
+                    size_mb = int(value) if value is not None else -1
+                    self._evaluator.set_hash_size(size_mb)
+                except ValueError:
+                    logger.info("Ignoring invalid Hash value: %s", value)
+                    return
+                logger.info("Hash size set to %d MB", size_mb)
+
+            case _:
+                logger.info("Unrecognized option %s, ignoring it.", name)
+
     @staticmethod
     def _send_engine_command(command: _EngineCommand) -> None:
         match command:
@@ -274,6 +363,12 @@ class UciEngine:
                 ut.thread_exclusive_print(f"id name {name}")
                 ut.thread_exclusive_print(f"id author {author}")
 
+            case _SpinOption(name, default, min_value, max_value):
+                ut.thread_exclusive_print(
+                    f"option name {name} type spin default {default} "
+                    f"min {min_value} max {max_value}"
+                )
+
             case _ReadyOk():
                 ut.thread_exclusive_print("readyok")
 
@@ -282,12 +377,16 @@ class UciEngine:
                     f"bestmove {move.to_long_algebraic_notation()}"
                 )
 
-            case _Info(depth, cp, pv):
+            case _PerftResult(report):
+                for line in report.make_text_lines():
+                    ut.thread_exclusive_print(line)
+
+            case _Info(depth, centipawns, pv):
                 formatted_pv = " ".join(
                     [move.to_long_algebraic_notation() for move in pv]
                 )
                 ut.thread_exclusive_print(
-                    f"info depth {depth} score cp {cp} pv {formatted_pv}"
+                    f"info depth {depth} score cp {centipawns} pv {formatted_pv}"
                 )
 
             case _:
@@ -329,9 +428,17 @@ class UciEngine:
                 go_parse_result = _UciArgParser.parse_go_args(args)
                 if go_parse_result is None:
                     return None
-                mode, depth = go_parse_result
+                mode, depth, limits = go_parse_result
+
+                return _Go(mode, depth, limits)
+
+            case "setoption":
+                setoption_parse_result = _UciArgParser.parse_setoption_args(args)
+                if setoption_parse_result is None:
+                    return None
+                name, value = setoption_parse_result
 
-                return _Go(mode, depth)
+                return _SetOption(name, value)
 
             case "stop":
                 return _Stop()
@@ -361,7 +468,7 @@ class _UciArgParser:
         position_identifier: str, fen_or_movelist: list[str]
     ) -> tuple[str, list[str]] | None:
         if position_identifier == "startpos":
-            initial_fen = _initial_position_fen
+            initial_fen = cb.INITIAL_POSITION_FEN
 
         elif position_identifier == "fen":
             if len(fen_or_movelist) == 0:
@@ -430,28 +537,67 @@ class _UciArgParser:
         return moves
 
     @staticmethod
-    def parse_go_args(args: list[str]) -> tuple[_GoMode, int] | None:
+    def parse_setoption_args(args: list[str]) -> tuple[str, str | None] | None:
+        # setoption name <id> [value <x>], where both <id> and <x> may have spaces.
+        if len(args) < 2 or args[0] != "name":  # noqa: PLR2004
+            logger.info("setoption must be followed by `name <id>`, got %s", args)
+            return None
+
+        try:
+            value_idx = args.index("value")
+        except ValueError:
+            return " ".join(args[1:]), None
+
+        name = " ".join(args[1:value_idx])
+        if not name:
+            logger.info("setoption is missing the option name: %s", args)
+            return None
+        return name, " ".join(args[value_idx + 1 :])
+
+    @staticmethod
+    def parse_go_args__number(name: str, remaining_args: Iterator[str]) -> int | None:
+        number = next(remaining_args, None)
+        try:
+            return int(number or "")
+        except ValueError:
+            logger.info("%s is not a valid %s, ignoring.", number, name)
+            return None
+
+    @classmethod
+    def parse_go_args(
+        cls, args: list[str]
+    ) -> tuple[_GoMode, int, ctm.SearchLimits] | None:
         depth = -1
         go_mode: _GoMode | None = None
-        for i, value in enumerate(args):
+        limit_values: dict[str, int] = {}
+        remaining_args = iter(args)
+        for value in remaining_args:
             match value:
                 case "infinite":
                     go_mode = _GoMode.INFINITE
 
-                case "depth" if i < len(args) - 1:
-                    depth_value = args[i + 1]
-                    try:
-                        depth = int(depth_value)
-                    except ValueError:
-                        logger.info("%s is not a valid depth, ignoring.", depth_value)
-                        continue
-                    go_mode = _GoMode.BY_DEPTH
+                case "depth" | "perft":
+                    number = cls.parse_go_args__number(value, remaining_args)
+                    if number is not None:
+                        depth = number
+                        go_mode = (
+                            _GoMode.BY_DEPTH if value == "depth" else _GoMode.PERFT
+                        )
+
+                case _ if value in _go_limit_args:
+                    number = cls.parse_go_args__number(value, remaining_args)
+                    if number is not None:
+                        limit_values[_go_limit_args[value]] = number
 
                 case _:
                     logger.info("Unrecognized go arg: %s. Ignoring..", value)
 
+        limits = ctm.SearchLimits(**limit_values)
+        if limits.is_limited() and go_mode in {None, _GoMode.BY_DEPTH}:
+            go_mode = _GoMode.BY_LIMITS
+
         if go_mode is None:
             logger.info("go command does not specify any mode, unable to proceed")
             return None
 
-        return go_mode, depth
+        return go_mode, depth, limits
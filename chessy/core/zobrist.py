@@ -0,0 +1,45 @@
+"""
+Random keys used to build Zobrist hashes of positions. A position's key is the XOR of
+the keys of everything that describes it, so moves can update it incrementally.
+"""
+
+from __future__ import annotations
+
+import random
+
+import chessy.core as c
+import chessy.core.piececode as cpc
+
+# Fixed seed so keys (and hence hashes) are stable across runs.
+_rng = random.Random(0x0C4E55)  # noqa: S311
+
+
+def _random_key() -> int:
+    return _rng.getrandbits(64)
+
+
+# Indexed by [piece code][square value], see `cpc`. Codes that are not pieces have no
+# keys.
+PIECE_SQUARE_KEYS = [
+    [_random_key() for _ in c.Square] if cpc.to_piece(code) is not None else []
+    for code in range(cpc.LIMIT)
+]
+# Indexed by the 4-bit mask built by `c.CastlingAvailability.to_mask`.
+CASTLING_KEYS = [_random_key() for _ in range(16)]
+EN_PASSANT_FILE_KEYS = [_random_key() for _ in range(c.Square.last_file() + 1)]
+BLACK_TO_MOVE_KEY = _random_key()
+
+
+def castling_key(castling_rights: int) -> int:
+    """`castling_rights` is as built by `c.CastlingAvailability.to_mask`."""
+    return CASTLING_KEYS[castling_rights]
+
+
+def en_passant_key(en_passant_target: c.Square | None) -> int:
+    if en_passant_target is None:
+        return 0
+    return EN_PASSANT_FILE_KEYS[en_passant_target.file()]
+
+
+def active_color_key(active_color: c.Color) -> int:
+    return BLACK_TO_MOVE_KEY if active_color == c.Color.BLACK else 0
@@ -0,0 +1,126 @@
+import argparse
+import contextlib
+import sys
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+import chessy.core.atkgen as ca
+import chessy.core.board as cb
+import chessy.core.perft as cp
+import chessy.utils as ut
+
+
+@dataclass(frozen=True, slots=True)
+class CliArgs:
+    depth: int | None
+    fen: str
+    suite: bool
+    max_nodes: int
+    jobs: int
+
+
+def parse_cli_args() -> CliArgs:
+    parser = argparse.ArgumentParser(
+        description="chessy move generation checker and benchmark"
+    )
+    parser.add_argument(
+        "depth",
+        nargs="?",
+        type=int,
+        help="Run perft divide up to this depth. Required unless --suite is used.",
+    )
+    parser.add_argument(
+        "-f",
+        "--fen",
+        default=cb.INITIAL_POSITION_FEN,
+        help="The FEN to run perft divide from. Defaults to the initial position.",
+    )
+    parser.add_argument(
+        "-s",
+        "--suite",
+        action="store_true",
+        help="Check the node counts of the bundled standard perft positions.",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-nodes",
+        type=int,
+        default=100_000,
+        help="With --suite, skip the depths expected to have more nodes than this.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes. Defaults to 1, which runs perft in this"
+            " process."
+        ),
+    )
+    args = parser.parse_args()
+    if args.depth is None and not args.suite:
+        parser.error("either a depth or --suite is required")
+    return CliArgs(
+        depth=args.depth,
+        fen=args.fen,
+        suite=args.suite,
+        max_nodes=args.max_nodes,
+        jobs=max(args.jobs, 1),
+    )
+
+
+def run_divide(fen: str, depth: int, executor: Executor | None) -> None:
+    report = cp.timed_divide(cb.Board.from_fen(fen), depth, executor)
+    for line in report.make_text_lines():
+        ut.thread_exclusive_print(line)
+
+
+def run_suite(max_nodes: int, executor: Executor | None) -> bool:
+    """Return whether every checked node count was correct."""
+
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+    for position in cp.STANDARD_POSITIONS:
+        for depth, expected in enumerate(position.expected_nodes, start=1):
+            if expected > max_nodes:
+                break
+
+            board = cb.Board.from_fen(position.fen)
+            nodes = cp.timed_divide(board, depth, executor).nodes
+            total_nodes += nodes
+            passed = nodes == expected
+            all_passed &= passed
+            ut.thread_exclusive_print(
+                f"{'PASS' if passed else 'FAIL'} {position.name} depth {depth}: "
+                f"{nodes} (expected {expected})"
+            )
+
+    seconds = time.perf_counter() - start
+    nps = int(total_nodes / seconds) if seconds > 0 else 0
+    ut.thread_exclusive_print(
+        f"{total_nodes} nodes in {seconds:.3f}s ({nps} nodes/second)"
+    )
+    return all_passed
+
+
+def main() -> None:
+    args = parse_cli_args()
+
+    # Initialize the attack tables upfront so they are not timed.
+    ca.force_init_all_tables()
+
+    # One pool for the whole run, so that its processes are only started once.
+    with (
+        cp.create_executor(args.jobs) if args.jobs > 1 else contextlib.nullcontext()
+    ) as executor:
+        if args.suite and not run_suite(args.max_nodes, executor):
+            sys.exit(1)
+        if args.depth is not None:
+            run_divide(args.fen, args.depth, executor)
+
+
+if __name__ == "__main__":
+    main()